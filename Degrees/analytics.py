@@ -0,0 +1,250 @@
+"""
+Whole-graph statistics for the Degrees dataset.
+
+Computes, over the compact graph:
+    - connected components and their sizes;
+    - histograms of movies per person, stars per movie and co-stars per person;
+    - the distribution of degrees of separation, its mean, and the
+      eccentricity (greatest separation from anyone reachable) of a random
+      sample of people, estimated with a multi-source BFS.
+
+The multi-source BFS runs all sampled searches in the same pass: each
+person holds a bitset (a Python int) with bit i set once search i has
+reached them, so a single sweep over the graph advances every search by
+one layer at once.
+"""
+
+import json
+import random
+import sys
+from array import array
+from collections import Counter
+
+import snapshot
+
+SAMPLES = 256
+
+# Sampled searches run together in batches of this many bits
+BATCH = 64
+
+USAGE = "Usage: python analytics.py [--json] directory [samples]"
+
+
+def components(graph):
+    """
+    Returns (labels, sizes): the component number of every person,
+    and the number of people in each component, largest first.
+    """
+    labels = array("i", [-1]) * graph.num_people
+    seen_movies = bytearray(graph.num_movies)
+    person_offsets, person_movies = graph.person_offsets, graph.person_movies
+    movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+
+    sizes = []
+    for start in range(graph.num_people):
+        if labels[start] != -1:
+            continue
+        label = len(sizes)
+        labels[start] = label
+        size = 1
+        stack = [start]
+        while stack:
+            p = stack.pop()
+            for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                    if labels[q] == -1:
+                        labels[q] = label
+                        size += 1
+                        stack.append(q)
+        sizes.append(size)
+
+    # Renumber so component 0 is the largest
+    order = sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True)
+    rank = array("i", bytes(4 * len(sizes)))
+    for new, old in enumerate(order):
+        rank[old] = new
+    for p in range(graph.num_people):
+        labels[p] = rank[labels[p]]
+    return labels, [sizes[old] for old in order]
+
+
+def histogram(values):
+    """
+    Returns a dictionary counting `values` in power-of-two buckets
+    ("0", "1", "2-3", "4-7", ...), in increasing order.
+    """
+    counts = Counter(value.bit_length() for value in values)
+    buckets = {}
+    for bits in sorted(counts):
+        if bits <= 1:
+            buckets[str(bits)] = counts[bits]
+        else:
+            buckets[f"{1 << (bits - 1)}-{(1 << bits) - 1}"] = counts[bits]
+    return buckets
+
+
+def costar_counts(graph):
+    """
+    Yields the number of distinct co-stars of each person.
+    """
+    for p in range(graph.num_people):
+        costars = set()
+        for m in graph.movies_for_person(p):
+            costars.update(graph.stars_for_movie(m))
+        costars.discard(p)
+        yield len(costars)
+
+
+def multi_source_bfs(graph, sources):
+    """
+    Breadth-first search from every person in `sources` at once.
+
+    Returns (separations, eccentricities): a Counter of how many
+    (source, person) pairs are each number of degrees apart, excluding
+    each source itself, and the eccentricity of each source within its component.
+    """
+    person_offsets, person_movies = graph.person_offsets, graph.person_movies
+    movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+
+    # seen[p] has bit i set once sources[i] has reached person p
+    seen = [0] * graph.num_people
+    frontier = {}
+    for i, source in enumerate(sources):
+        seen[source] |= 1 << i
+        frontier[source] = frontier.get(source, 0) | 1 << i
+
+    separations = Counter()
+    eccentricities = [0] * len(sources)
+    depth = 0
+    while frontier:
+        depth += 1
+
+        # Gather, per movie, which searches reach it this layer
+        reaching = {}
+        for p, bits in frontier.items():
+            for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                reaching[m] = reaching.get(m, 0) | bits
+
+        next_frontier = {}
+        for m, bits in reaching.items():
+            for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                new = bits & ~seen[q]
+                if new:
+                    seen[q] |= new
+                    next_frontier[q] = next_frontier.get(q, 0) | new
+
+        reached = 0
+        for bits in next_frontier.values():
+            separations[depth] += bin(bits).count("1")
+            reached |= bits
+        for i in range(len(sources)):
+            if reached >> i & 1:
+                eccentricities[i] = depth
+        frontier = next_frontier
+    return separations, eccentricities
+
+
+def separation(graph, sources):
+    """
+    Runs multi_source_bfs over `sources` in batches of BATCH.
+    """
+    separations = Counter()
+    eccentricities = []
+    for start in range(0, len(sources), BATCH):
+        batch_separations, batch_eccentricities = multi_source_bfs(graph, sources[start:start + BATCH])
+        separations.update(batch_separations)
+        eccentricities.extend(batch_eccentricities)
+    return separations, eccentricities
+
+
+def report(graph, samples=SAMPLES, seed=0):
+    """
+    Returns a JSON-serializable dictionary of statistics about `graph`,
+    estimating separation from `samples` random people in the largest component.
+    """
+    labels, sizes = components(graph)
+    movies_per_person = (graph.person_offsets[p + 1] - graph.person_offsets[p] for p in range(graph.num_people))
+    stars_per_movie = (graph.movie_offsets[m + 1] - graph.movie_offsets[m] for m in range(graph.num_movies))
+
+    largest = [p for p in range(graph.num_people) if labels[p] == 0] if sizes else []
+    sources = random.Random(seed).sample(largest, min(samples, len(largest)))
+    separations, eccentricities = separation(graph, sources)
+    pairs = sum(separations.values())
+
+    return {
+        "people": graph.num_people,
+        "movies": graph.num_movies,
+        "components": {
+            "count": len(sizes),
+            "largest": sizes[:10],
+            "singletons": sum(1 for size in sizes if size == 1)
+        },
+        "movies_per_person": histogram(movies_per_person),
+        "stars_per_movie": histogram(stars_per_movie),
+        "costars_per_person": histogram(costar_counts(graph)),
+        "separation": {
+            "samples": len(sources),
+            "mean": sum(depth * count for depth, count in separations.items()) / pairs if pairs else None,
+            "distribution": {str(depth): separations[depth] for depth in sorted(separations)}
+        },
+        "eccentricity": {
+            "distribution": {str(e): count for e, count in sorted(Counter(eccentricities).items())},
+            "max": max(eccentricities, default=None),
+            "people": [
+                {"id": graph.person_ids[p], "name": graph.names[p], "eccentricity": e}
+                for p, e in sorted(zip(sources, eccentricities), key=lambda pair: pair[1], reverse=True)[:10]
+            ]
+        }
+    }
+
+
+def print_report(stats):
+    print(f"{stats['people']:,} people, {stats['movies']:,} movies")
+    components = stats["components"]
+    print(f"{components['count']:,} connected components ({components['singletons']:,} of a single person); "
+          f"largest: {', '.join(f'{size:,}' for size in components['largest'])}")
+    for key, title in (("movies_per_person", "Movies per person"),
+                       ("stars_per_movie", "Stars per movie"),
+                       ("costars_per_person", "Co-stars per person")):
+        print(f"{title}:")
+        for bucket, count in stats[key].items():
+            print(f"  {bucket:>12}: {count:,}")
+
+    separation = stats["separation"]
+    print(f"Degrees of separation, sampled from {separation['samples']} people in the largest component:")
+    if separation["mean"] is not None:
+        print(f"  mean: {separation['mean']:.3f}")
+    for depth, count in separation["distribution"].items():
+        print(f"  {depth:>12}: {count:,}")
+
+    eccentricity = stats["eccentricity"]
+    print(f"Eccentricity of sampled people (max {eccentricity['max']}):")
+    for e, count in eccentricity["distribution"].items():
+        print(f"  {e:>12}: {count:,}")
+    for person in eccentricity["people"]:
+        print(f"  {person['name']} ({person['id']}): {person['eccentricity']}")
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    if len(args) not in (1, 2) or flags - {"--json"}:
+        sys.exit(USAGE)
+    samples = int(args[1]) if len(args) == 2 else SAMPLES
+
+    print("Loading data...", file=sys.stderr)
+    graph = snapshot.load_cached(args[0], progress=True)
+    print("Data loaded.", file=sys.stderr)
+
+    stats = report(graph, samples)
+    if "--json" in flags:
+        print(json.dumps(stats, indent=2))
+    else:
+        print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Answer many Degrees queries against one loaded dataset.
+
+Reads one query per line, either as a JSON object {"source": name,
+"target": name} or as two names separated by a tab, and writes one JSON
+result per line. A JSON query may also ask for up to N alternative
+shortest paths with "alternatives": N.
+"""
+
+import json
+import sys
+from itertools import islice
+
+import degrees
+import loader
+import parallel
+
+# How many similar names to suggest for a name that isn't found
+SUGGESTIONS = 5
+
+USAGE = ("Usage: python batch.py [--compact] [--bidirectional] [--landmarks] [--alt] [--parallel] "
+         "directory [queries]")
+
+
+def answer(source_name, target_name, bidirectional=False, alternatives=0, alt=False):
+    """
+    Returns a JSON-serializable dictionary answering one query:
+    the two names, plus either "degrees" and "path" (a list of
+    {"movie", "year", "person"} steps, or None if not connected) or an "error".
+    With `alternatives`, also lists up to that many shortest paths.
+    `bidirectional` and `alt` choose the search, as in degrees.shortest_path.
+    """
+    result, person_ids = resolve(source_name, target_name)
+    if person_ids is None:
+        return result
+    path = degrees.shortest_path(*person_ids, bidirectional=bidirectional, alt=alt)
+    describe(result, path)
+    if alternatives:
+        add_alternatives(result, person_ids, alternatives)
+    return result
+
+
+def resolve(source_name, target_name):
+    """
+    Looks up the people in one query. Returns (result, person_ids), where
+    person_ids is None, and result holds the error, if either name doesn't
+    match exactly one person.
+    """
+    result = {"source": source_name, "target": target_name}
+    person_ids = []
+    for name in (source_name, target_name):
+        matches = degrees.person_ids_for_name(name)
+        if len(matches) == 0:
+            result["error"] = f"Person not found: {name}"
+            result["suggestions"] = degrees.search_people(name, SUGGESTIONS)
+            return result, None
+        if len(matches) > 1:
+            result["error"] = f"Ambiguous name: {name}"
+            result["candidates"] = [
+                dict(id=person_id, **degrees.person_for_id(person_id)) for person_id in matches
+            ]
+            return result, None
+        person_ids.append(matches[0])
+    return result, person_ids
+
+
+def describe(result, path):
+    """
+    Adds "degrees" and "path" for a list of (movie_id, person_id) pairs to `result`.
+    """
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = steps(path)
+    return result
+
+
+def steps(path):
+    """
+    Returns the {"movie", "year", "person"} steps of a list of (movie_id, person_id) pairs.
+    """
+    return [
+        {"movie": degrees.movie_for_id(movie_id)["title"],
+         "year": degrees.movie_for_id(movie_id)["year"],
+         "person": degrees.person_for_id(person_id)["name"]}
+        for movie_id, person_id in path
+    ]
+
+
+def add_alternatives(result, person_ids, limit):
+    """
+    Adds "alternatives" to `result`: up to `limit` shortest paths between
+    the two people, each a list of steps.
+    """
+    paths = islice(degrees.all_shortest_paths(*person_ids), limit)
+    result["alternatives"] = [steps(path) for path in paths]
+    return result
+
+
+def parse_query(line):
+    """
+    Returns the (source, target, alternatives) in one line of input, or None.
+    Raises ValueError if a JSON query's names are not strings, or its
+    "alternatives" is not a non-negative integer.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        query = json.loads(line)
+        source, target = query["source"], query["target"]
+        if not isinstance(source, str) or not isinstance(target, str):
+            raise ValueError("Names must be strings")
+        alternatives = query.get("alternatives", 0)
+        if not isinstance(alternatives, int) or isinstance(alternatives, bool) or alternatives < 0:
+            raise ValueError("Alternatives must be a non-negative integer")
+        return source, target, alternatives
+    source, target = line.split("\t")
+    return source, target, 0
+
+
+def run(lines, output, bidirectional=False, alt=False):
+    """
+    Answers every query in `lines`, writing JSON results to `output`.
+    """
+    for query in parse_queries(lines):
+        if "error" in query:
+            output.write(json.dumps(query) + "\n")
+        else:
+            source, target, alternatives = query
+            output.write(json.dumps(answer(source, target, bidirectional, alternatives, alt)) + "\n")
+
+
+def run_parallel(lines, output, bidirectional=False, processes=None):
+    """
+    Like run, but searches for paths across a pool of worker processes.
+    Requires the compact graph to be loaded.
+    """
+    graph = degrees.graph
+    results = []
+    pairs = []
+    for query in parse_queries(lines):
+        if "error" in query:
+            results.append((query, None, 0))
+            continue
+        source, target, alternatives = query
+        result, person_ids = resolve(source, target)
+        results.append((result, person_ids, alternatives))
+        if person_ids is not None:
+            pairs.append([graph.person_index(person_id) for person_id in person_ids])
+
+    paths = parallel.parallel_paths(graph, pairs, processes, bidirectional)
+    for result, person_ids, alternatives in results:
+        if person_ids is not None:
+            describe(result, graph.path_ids(next(paths)))
+            if alternatives:
+                add_alternatives(result, person_ids, alternatives)
+        output.write(json.dumps(result) + "\n")
+
+
+def parse_queries(lines):
+    """
+    Yields the (source, target, alternatives) in each line of input,
+    or an error dictionary for lines that can't be parsed.
+    """
+    for line in lines:
+        try:
+            query = parse_query(line)
+        except (ValueError, KeyError, TypeError):
+            yield {"input": line.rstrip("\n"), "error": "Malformed query"}
+            continue
+        if query is not None:
+            yield query
+
+
+def parse_args(argv, usage, flags=("--compact", "--bidirectional", "--landmarks", "--alt")):
+    """
+    Splits command-line arguments into (positional args, flags), exiting on unknown flags.
+    """
+    args = [arg for arg in argv if not arg.startswith("--")]
+    given = {arg for arg in argv if arg.startswith("--")}
+    if given - set(flags):
+        sys.exit(usage)
+    return args, given
+
+
+def main():
+    args, flags = parse_args(sys.argv[1:], USAGE,
+                             ("--compact", "--bidirectional", "--landmarks", "--alt", "--parallel"))
+    # Worker processes search with the graph alone, without the landmark index
+    if len(args) not in (1, 2) or {"--alt", "--parallel"} <= flags:
+        sys.exit(USAGE)
+
+    # Worker processes share the compact graph, so --parallel implies --compact,
+    # and A* search uses the landmark index, so --alt implies --landmarks
+    print("Loading data...", file=sys.stderr)
+    alt = "--alt" in flags
+    stats = degrees.load(args[0], compact="--compact" in flags or "--parallel" in flags,
+                         use_landmarks="--landmarks" in flags or alt, progress=True)
+    print("Data loaded.", file=sys.stderr)
+    if stats:
+        print(loader.summary(stats), file=sys.stderr)
+
+    bidirectional = "--bidirectional" in flags
+    lines = open(args[1], encoding="utf-8") if len(args) == 2 else sys.stdin
+    with lines:
+        if "--parallel" in flags:
+            run_parallel(lines, sys.stdout, bidirectional)
+        else:
+            run(lines, sys.stdout, bidirectional, alt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for the search frontiers in util.py.
+
+Pushes and pops `n` nodes through each frontier, checking membership
+along the way as shortest_path does, and reports operations per second.
+The old list-based frontiers are included for comparison, but only at
+sizes where their quadratic cost finishes in reasonable time.
+"""
+
+import sys
+import time
+
+from util import Node, StackFrontier, QueueFrontier
+
+
+class ListStackFrontier():
+    """
+    The original list-based StackFrontier, kept here as a baseline.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[-1]
+        self.frontier = self.frontier[:-1]
+        return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+    """
+    The original list-based QueueFrontier, kept here as a baseline.
+    """
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def run(frontier_class, n, lookups):
+    """
+    Returns the seconds taken to add `n` nodes, make `lookups` contains_state
+    calls, and remove every node again.
+    """
+    frontier = frontier_class()
+    start = time.perf_counter()
+    for i in range(n):
+        frontier.add(Node(state=i, parent=None, action=None))
+    for i in range(lookups):
+        frontier.contains_state(n - i)
+    while not frontier.empty():
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [n]")
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 10 ** 6
+
+    print(f"{'frontier':<20}{'nodes':>10}{'seconds':>10}{'ops/sec':>14}")
+    trials = [(StackFrontier, n, n), (QueueFrontier, n, n)]
+    for size in (10 ** 3, 10 ** 4):
+        trials += [(ListStackFrontier, size, 100), (ListQueueFrontier, size, 100)]
+
+    for frontier_class, size, lookups in trials:
+        seconds = run(frontier_class, size, lookups)
+        ops = 2 * size + lookups
+        print(f"{frontier_class.__name__:<20}{size:>10}{seconds:>10.3f}{ops / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
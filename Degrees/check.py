@@ -0,0 +1,108 @@
+"""
+Batch runs over a copy of a dataset with awkward input, on each backend.
+
+Copies the CSV files of a directory (default: small) to a temporary
+directory, adds a second person with the name of an existing one and a
+blank and a short row, then runs batch.py over queries that find a path,
+hit the ambiguous name and misspell a name, checking that every answer
+is a JSON line of the expected kind. Exits with an error if any run fails.
+
+Usage:
+    python check.py [directory]
+"""
+
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from snapshot import SOURCES
+
+USAGE = "Usage: python check.py [directory]"
+BATCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch.py")
+
+# Backends to run batch.py on, by their flags
+BACKENDS = ([], ["--compact"])
+
+
+def prepare(directory, target):
+    """
+    Copies the CSV files of `directory` to `target`, adding a person with
+    the same name as the first one, and a blank line and a short row to
+    the stars. Returns (that name, the last person's name, which is still
+    unique).
+    """
+    for filename in SOURCES:
+        shutil.copy(os.path.join(directory, filename), target)
+    with open(os.path.join(target, "people.csv"), encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    first, last = rows[0], rows[-1]
+    with open(os.path.join(target, "people.csv"), "a", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerow([max(int(row["id"]) for row in rows) + 1, first["name"], ""])
+    with open(os.path.join(target, "stars.csv"), "a", encoding="utf-8", newline="") as f:
+        f.write("\n" + first["id"] + "\n")
+    return first["name"], last["name"]
+
+
+def queries(name, other):
+    """
+    Returns (query line, expected result key) pairs, for the ambiguous `name`
+    and a person `other` with a unique name.
+    """
+    return [
+        (f"{other}\t{other}", "path"),
+        (json.dumps({"source": other, "target": other, "alternatives": 2}), "alternatives"),
+        (f"{name}\t{other}", "candidates"),
+        (f"{other[:-1]}\t{other}", "suggestions"),
+        ("not a query", "error"),
+        (json.dumps({"source": 5, "target": other}), "error"),
+        (json.dumps({"source": other, "target": other, "alternatives": -1}), "error"),
+        (json.dumps({"source": other, "target": other, "alternatives": None}), "error")
+    ]
+
+
+def run(directory, flags, cases):
+    """
+    Runs batch.py with `flags` on `directory` over the query lines of
+    `cases`. Returns a list of problems found, empty if none.
+    """
+    process = subprocess.run(
+        [sys.executable, BATCH, *flags, directory], input="\n".join(line for line, _ in cases) + "\n",
+        capture_output=True, text=True, encoding="utf-8"
+    )
+    if process.returncode != 0:
+        return [f"exit status {process.returncode}: {process.stderr.strip().splitlines()[-1:]}"]
+    problems = []
+    results = process.stdout.splitlines()
+    if len(results) != len(cases):
+        problems.append(f"{len(results)} results for {len(cases)} queries")
+    for (line, key), output in zip(cases, results):
+        if key not in json.loads(output):
+            problems.append(f"no {key!r} in the answer to {line!r}: {output}")
+    return problems
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit(USAGE)
+    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+
+    failed = False
+    with tempfile.TemporaryDirectory() as target:
+        name, other = prepare(directory, target)
+        cases = queries(name, other)
+        for flags in BACKENDS:
+            problems = run(target, flags, cases)
+            print(f"batch.py {' '.join(flags or ['(dicts)'])}: {'ok' if not problems else 'FAILED'}")
+            for problem in problems:
+                print(f"    {problem}")
+            failed = failed or bool(problems)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
-import csv
+import math
 import sys
+from collections import Counter
 from pickle import EMPTY_LIST
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks
+import loader
+import nameindex
+import snapshot
+from util import Node, StackFrontier, QueueFrontier, bidirectional_search
+import util
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,52 +19,126 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
-def load_data(directory):
+# Compact integer-indexed alternative to the dicts above, set by load_graph
+graph = None
+
+# Landmark distance index over the compact graph, set by load_landmarks
+landmark_index = None
+
+# Prefix and trigram name index, loaded on first use by search_people,
+# with the person_ids its results refer to when using the dicts
+name_index = None
+name_index_ids = None
+
+# Directory the data was loaded from
+data_directory = None
+
+def load_data(directory, progress=False):
     """
     Load data from CSV files into memory.
+
+    Returns a Counter of the people, movies and stars loaded, of the
+    star rows skipped for naming an unknown person or movie, or repeating
+    an earlier row, and of the "malformed" rows too short to read.
     """
+    stats = Counter()
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    rows = loader.read_columns(f"{directory}/people.csv", ("id", "name", "birth"), progress, stats)
+    for person_id, name, birth in rows:
+        person_id = sys.intern(person_id)  # Star rows reuse this one string object
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
+        stats["people"] += 1
+
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    rows = loader.read_columns(f"{directory}/movies.csv", ("id", "title", "year"), progress, stats)
+    for movie_id, title, year in rows:
+        movies[sys.intern(movie_id)] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+        stats["movies"] += 1
+
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    rows = loader.read_columns(f"{directory}/stars.csv", ("person_id", "movie_id"), progress, stats)
+    for person_id, movie_id in rows:
+        person = people.get(person_id)
+        movie = movies.get(movie_id)
+        if person is None:
+            stats["unknown_person"] += 1
+        elif movie is None:
+            stats["unknown_movie"] += 1
+        elif movie_id in person["movies"]:
+            stats["duplicate"] += 1
+        else:
+            person["movies"].add(sys.intern(movie_id))
+            movie["stars"].add(sys.intern(person_id))
+            stats["stars"] += 1
+    return stats
+
+
+def load_graph(directory, progress=False):
+    """
+    Load CSV files into the compact graph store instead of the dicts,
+    reusing the directory's binary snapshot when it is up to date.
+
+    Returns a Counter as for load_data, empty if the snapshot was used.
+    """
+    global graph
+    stats = Counter()
+    graph = snapshot.load_cached(directory, progress, stats)
+    return stats
+
+
+def load_landmarks(directory):
+    """
+    Load (or build) the landmark distance index for the compact graph.
+    """
+    global landmark_index
+    landmark_index = landmarks.load_cached(directory, graph)
+
+
+def load(directory, compact=False, use_landmarks=False, progress=False):
+    """
+    Load data into the compact graph store or the dicts, returning
+    load_data's Counter of rows loaded and skipped.
+    The landmark index needs the compact graph, so it implies `compact`.
+    """
+    global data_directory
+    data_directory = directory
+    if compact or use_landmarks:
+        stats = load_graph(directory, progress)
+    else:
+        stats = load_data(directory, progress)
+    if use_landmarks:
+        load_landmarks(directory)
+    return stats
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    if len(args) > 1 or flags - {"--compact", "--bidirectional", "--landmarks", "--alt"}:
+        sys.exit("Usage: python degrees.py [--compact] [--bidirectional] [--landmarks] [--alt] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    # A* search uses the landmark index, so --alt implies --landmarks
+    alt = "--alt" in flags
+    stats = load(directory, compact="--compact" in flags, use_landmarks="--landmarks" in flags or alt, progress=True)
     print("Data loaded.")
+    if stats:
+        print(loader.summary(stats))
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -67,7 +147,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional="--bidirectional" in flags, alt=alt)
 
     if path is None:
         print("Not connected.")
@@ -76,19 +156,38 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_for_id(path[i][1])["name"]
+            person2 = person_for_id(path[i + 1][1])["name"]
+            movie = movie_for_id(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, alt=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    With `bidirectional`, searches from both the source and the target
+    at once, which is much faster between distant, well-connected people.
+    If the landmark index is loaded, people it shows are not connected
+    are answered without searching, and with `alt` the search is A*,
+    guided by the index's lower bounds (the ALT algorithm).
     """
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+        if landmark_index is not None and landmark_index.bounds(source, target)[0] == math.inf:
+            return None
+        if alt and landmark_index is not None:
+            return graph.path_ids(landmark_index.shortest_path(graph, source, target))
+        if bidirectional:
+            return graph.path_ids(graph.bidirectional_path(source, target))
+        return graph.path_ids(graph.shortest_path(source, target))
+
+    if bidirectional:
+        return bidirectional_search(source, target, neighbors_for_person)
+
     if source == target: # If person 1 = person 2, nothing to search
         return []
 
@@ -127,18 +226,42 @@ def shortest_path(source, target):
 
 
 
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, one at a time, so callers can rank alternative
+    chains or stop early without searching again. Yields nothing if they
+    are not connected.
+    """
+    if graph is not None:
+        for path in graph.all_shortest_paths(graph.person_index(source), graph.person_index(target)):
+            yield graph.path_ids(path)
+    else:
+        yield from util.all_shortest_paths(source, target, neighbors_for_person)
+
+
+def distance_bounds(source, target):
+    """
+    Returns (at least, at most) degrees of separation between two person_ids
+    from the landmark index, without searching. Either may be math.inf.
+    """
+    return landmark_index.bounds(graph.person_index(source), graph.person_index(target))
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
+        for match in search_people(name, 5):
+            print(f"Did you mean: ID: {match['id']}, Name: {match['name']}, Birth: {match['birth']}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_for_id(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -153,11 +276,45 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns a list of every IMDB id for a person's name, without prompting.
+    """
+    if graph is not None:
+        return [graph.person_ids[p] for p in graph.people_named(name)]
+    return list(names.get(name.lower(), set()))
+
+
+def search_people(name, limit=10):
+    """
+    Returns up to `limit` people whose names match `name` exactly, by prefix,
+    or approximately (allowing typos), best first, without prompting.
+    Each is a dictionary of id, name, birth and score.
+    """
+    global name_index, name_index_ids
+    if name_index is None:
+        if graph is not None:
+            name_index = nameindex.load_cached(data_directory, graph)
+        else:
+            name_index_ids = list(people)
+            name_index = nameindex.NameIndex.build([people[person_id]["name"] for person_id in name_index_ids])
+
+    matches = []
+    for i, score in name_index.search(name, limit):
+        person_id = graph.person_ids[i] if graph is not None else name_index_ids[i]
+        person = person_for_id(person_id)
+        matches.append({"id": person_id, "name": person["name"], "birth": person["birth"], "score": round(score, 3)})
+    return matches
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return set(graph.path_ids(graph.neighbors(graph.person_index(person_id))))
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -166,5 +323,27 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_for_id(person_id):
+    """
+    Returns a dictionary of name and birth for a person_id, from either backend.
+    """
+    if graph is not None:
+        p = graph.person_index(person_id)
+        return {"name": graph.names[p], "birth": graph.births[p]}
+    person = people[person_id]
+    return {"name": person["name"], "birth": person["birth"]}
+
+
+def movie_for_id(movie_id):
+    """
+    Returns a dictionary of title and year for a movie_id, from either backend.
+    """
+    if graph is not None:
+        m = graph.movie_index(movie_id)
+        return {"title": graph.titles[m], "year": graph.years[m]}
+    movie = movies[movie_id]
+    return {"title": movie["title"], "year": movie["year"]}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,390 @@
+"""
+Compact, integer-indexed store for the person-movie graph.
+
+Person and movie IDs are interned to dense integers, and the bipartite
+graph is kept as two CSR (compressed sparse row) adjacency structures:
+
+    person_offsets / person_movies -- movies each person starred in
+    movie_offsets / movie_stars    -- people who starred in each movie
+
+The movies of person `p` are person_movies[person_offsets[p]:person_offsets[p + 1]],
+so neighbor expansion is a couple of array slices instead of building sets.
+Strings are kept in StringTables (one UTF-8 blob plus an offsets array)
+rather than as millions of separate Python objects.
+"""
+
+from array import array
+from collections import Counter, deque
+
+from loader import read_columns
+from util import all_shortest_paths, bidirectional_search
+
+# Distance stored by distances_from for people not connected to the source
+UNREACHABLE = 255
+
+
+class StringTable():
+    """
+    Sequence of strings stored as one UTF-8 blob and an offsets array.
+    """
+
+    def __init__(self, blob=None, offsets=None):
+        self.blob = blob if blob is not None else bytearray()
+        self.offsets = offsets if offsets is not None else array("q", [0])
+
+    @classmethod
+    def from_strings(cls, strings):
+        if isinstance(strings, cls):
+            return strings
+        table = cls()
+        for string in strings:
+            table.append(string)
+        return table
+
+    def append(self, string):
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def sorted_order(table, key=None):
+    """
+    Returns an array of the indexes of `table`, sorted by (key of) their strings.
+    """
+    if key is None:
+        return array("i", sorted(range(len(table)), key=table.__getitem__))
+    return array("i", sorted(range(len(table)), key=lambda i: key(table[i])))
+
+
+def bisect_order(table, order, value, key=None):
+    """
+    Returns the first position in `order` whose string in `table`
+    (after applying `key`) is not less than `value`.
+    """
+    lo, hi = 0, len(order)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        string = table[order[mid]]
+        if key is not None:
+            string = key(string)
+        if string < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def build_csr(rows, columns, size):
+    """
+    Group `columns` by `rows` (parallel sequences of ints in [0, size)).
+    Returns (offsets, values), where the values of row r are
+    values[offsets[r]:offsets[r + 1]], in input order.
+    """
+    offsets = array("i", bytes(4 * (size + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array("i", offsets)
+    values = array("i", bytes(4 * len(rows)))
+    for row, column in zip(rows, columns):
+        values[cursor[row]] = column
+        cursor[row] += 1
+    return offsets, values
+
+
+class Graph():
+    """
+    Person-movie graph with people and movies numbered 0..n-1.
+
+    Methods take and return these integer indexes; use `person_index` /
+    `movie_index` and `person_ids` / `movie_ids` to translate to and from
+    the IMDb string IDs.
+    """
+
+    def __init__(self, person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order=None, movie_order=None, name_order=None):
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_ids = movie_ids
+        self.titles = titles
+        self.years = years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Indexes sorted by IMDb id and by lowercase name, for binary search lookups
+        self.person_order = person_order if person_order is not None else sorted_order(person_ids)
+        self.movie_order = movie_order if movie_order is not None else sorted_order(movie_ids)
+        self.name_order = name_order if name_order is not None else sorted_order(names, str.lower)
+
+    @classmethod
+    def from_csv(cls, directory, progress=False, stats=None):
+        """
+        Load people.csv, movies.csv and stars.csv from `directory`,
+        reporting progress to stderr if `progress`. If given, the `stats`
+        Counter is filled in as by degrees.load_data.
+        """
+        stats = stats if stats is not None else Counter()
+
+        person_index = {}
+        person_ids, names, births = StringTable(), StringTable(), StringTable()
+        for person_id, name, birth in read_columns(f"{directory}/people.csv", ("id", "name", "birth"), progress, stats):
+            person_index[person_id] = len(person_index)
+            person_ids.append(person_id)
+            names.append(name)
+            births.append(birth)
+        stats["people"] += len(person_index)
+
+        movie_index = {}
+        movie_ids, titles, years = StringTable(), StringTable(), StringTable()
+        for movie_id, title, year in read_columns(f"{directory}/movies.csv", ("id", "title", "year"), progress, stats):
+            movie_index[movie_id] = len(movie_index)
+            movie_ids.append(movie_id)
+            titles.append(title)
+            years.append(year)
+        stats["movies"] += len(movie_index)
+
+        stars_people = array("i")
+        stars_movies = array("i")
+        seen = set()
+        for person_id, movie_id in read_columns(f"{directory}/stars.csv", ("person_id", "movie_id"), progress, stats):
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is None:
+                stats["unknown_person"] += 1
+                continue
+            if m is None:
+                stats["unknown_movie"] += 1
+                continue
+            # The dict backend keeps stars in sets, so drop repeated rows too
+            key = p * len(movie_index) + m
+            if key in seen:
+                stats["duplicate"] += 1
+                continue
+            seen.add(key)
+            stars_people.append(p)
+            stars_movies.append(m)
+        stats["stars"] += len(stars_people)
+
+        return cls.from_edges(person_ids, names, births, movie_ids, titles, years,
+                              stars_people, stars_movies)
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Build from the `people` and `movies` dicts used by degrees.py.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        stars_people = array("i")
+        stars_movies = array("i")
+        for p, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                stars_people.append(p)
+                stars_movies.append(movie_index[movie_id])
+        return cls.from_edges(
+            person_ids,
+            [people[person_id]["name"] for person_id in person_ids],
+            [people[person_id]["birth"] for person_id in person_ids],
+            movie_ids,
+            [movies[movie_id]["title"] for movie_id in movie_ids],
+            [movies[movie_id]["year"] for movie_id in movie_ids],
+            stars_people, stars_movies
+        )
+
+    @classmethod
+    def from_edges(cls, person_ids, names, births, movie_ids, titles, years,
+                   stars_people, stars_movies):
+        """
+        Build from lists of person/movie fields and parallel arrays of
+        (person index, movie index) star edges.
+        """
+        person_offsets, person_movies = build_csr(stars_people, stars_movies, len(person_ids))
+        movie_offsets, movie_stars = build_csr(stars_movies, stars_people, len(movie_ids))
+        return cls(
+            StringTable.from_strings(person_ids),
+            StringTable.from_strings(names),
+            StringTable.from_strings(births),
+            StringTable.from_strings(movie_ids),
+            StringTable.from_strings(titles),
+            StringTable.from_strings(years),
+            person_offsets, person_movies, movie_offsets, movie_stars
+        )
+
+    @property
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDb id `person_id`, or None.
+        """
+        i = bisect_order(self.person_ids, self.person_order, person_id)
+        if i < len(self.person_order) and self.person_ids[self.person_order[i]] == person_id:
+            return self.person_order[i]
+        return None
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDb id `movie_id`, or None.
+        """
+        i = bisect_order(self.movie_ids, self.movie_order, movie_id)
+        if i < len(self.movie_order) and self.movie_ids[self.movie_order[i]] == movie_id:
+            return self.movie_order[i]
+        return None
+
+    def people_named(self, name):
+        """
+        Returns the indexes of all people whose name matches `name`, ignoring case.
+        """
+        name = name.lower()
+        order = self.name_order
+        i = bisect_order(self.names, order, name, str.lower)
+        matches = []
+        while i < len(order) and self.names[order[i]].lower() == name:
+            matches.append(order[i])
+            i += 1
+        return matches
+
+    def movies_for_person(self, p):
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_for_movie(self, m):
+        return self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, p):
+        """
+        Yields (movie, person) index pairs for people who starred with person `p`,
+        including `p` itself once per movie, like neighbors_for_person.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[i]
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                yield m, movie_stars[j]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person `source` to person `target`.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        # parent[p] is the person p was reached from, via movie via[p]; -1 if unseen
+        parent = array("i", [-1]) * self.num_people
+        via = array("i", [-1]) * self.num_people
+        parent[source] = source
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        seen_movies = set()  # Each movie only needs expanding once
+
+        frontier = deque([source])
+        while frontier:
+            p = frontier.popleft()
+            for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                if m in seen_movies:
+                    continue
+                seen_movies.add(m)
+                for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                    if parent[q] != -1:
+                        continue
+                    parent[q] = p
+                    via[q] = m
+                    if q == target:
+                        return self._trace(parent, via, target)
+                    frontier.append(q)
+        return None
+
+    def degree(self, p):
+        """
+        Returns the number of (movie, person) pairs person `p` is connected to.
+        """
+        return sum(self.movie_offsets[m + 1] - self.movie_offsets[m] for m in self.movies_for_person(p))
+
+    def distances_from(self, source):
+        """
+        Returns a bytearray holding the number of degrees of separation between
+        person `source` and every person, or UNREACHABLE if not connected.
+        """
+        distances = bytearray([UNREACHABLE]) * self.num_people
+        distances[source] = 0
+        seen_movies = bytearray(self.num_movies)
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            if depth == UNREACHABLE:
+                raise ValueError("degrees of separation too large to store")
+            next_layer = []
+            for p in layer:
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                        if distances[q] == UNREACHABLE:
+                            distances[q] = depth
+                            next_layer.append(q)
+            layer = next_layer
+        return distances
+
+    def bidirectional_path(self, source, target):
+        """
+        Like shortest_path, but searches from both ends at once,
+        which visits far fewer people between distant, well-connected actors.
+        """
+        return bidirectional_search(source, target, self.neighbors)
+
+    def all_shortest_paths(self, source, target):
+        """
+        Yields every shortest path between people `source` and `target`,
+        in the same form as shortest_path, one at a time.
+        """
+        return all_shortest_paths(source, target, self.neighbors)
+
+    def _trace(self, parent, via, target):
+        """
+        Follows parent pointers back from `target` to the search root.
+        """
+        path = []
+        p = target
+        while parent[p] != p:
+            path.append((via[p], p))
+            p = parent[p]
+        path.reverse()
+        return path
+
+    def path_ids(self, path):
+        """
+        Converts a path of index pairs to (movie_id, person_id) string pairs.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[m], self.person_ids[p]) for m, p in path]
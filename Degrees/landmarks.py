@@ -0,0 +1,194 @@
+"""
+Landmark distance index for the compact Degrees graph.
+
+Breadth-first distances from a few dozen high-degree people ("landmarks")
+are precomputed, one byte per person per landmark. By the triangle
+inequality, for every landmark l:
+
+    |d(l, s) - d(l, t)|  <=  d(s, t)  <=  d(l, s) + d(l, t)
+
+so bounds on the degrees of separation between any two people take a
+handful of byte lookups. The bounds also show when two people are not
+connected at all, which a plain search only learns by exhausting one
+person's whole component. The lower bound can serve as an A* heuristic
+too (the ALT algorithm, chosen with --alt in degrees.py, batch.py and
+server.py), although on small-world graphs like this one, where the
+bounds are loose, bidirectional search is usually faster.
+
+The index is saved next to the CSV files and, like the snapshot, rebuilt
+whenever they change.
+"""
+
+import heapq
+import os
+import sys
+from operator import sub
+
+import snapshot
+from graph import UNREACHABLE
+
+MAGIC = b"DEGLMRK\n"
+VERSION = 2
+FILENAME = "degrees.landmarks"
+COUNT = 32
+
+
+class Landmarks():
+    """
+    Distances from each landmark to every person, stored person-major:
+    distances[p * count + i] is the distance from landmark i to person p.
+    """
+
+    def __init__(self, people, distances, requested=None):
+        self.people = people
+        self.count = len(people)
+        self.distances = distances
+        # How many landmarks were asked for, which small graphs may not have
+        self.requested = requested if requested is not None else self.count
+
+    @classmethod
+    def build(cls, graph, count=COUNT):
+        """
+        Picks the `count` people with the most co-stars as landmarks
+        and runs a breadth-first search from each.
+        """
+        requested, count = count, min(count, graph.num_people)
+        people = sorted(range(graph.num_people), key=graph.degree, reverse=True)[:count]
+        distances = bytearray(graph.num_people * count)
+        for i, landmark in enumerate(people):
+            distances[i::count] = graph.distances_from(landmark)
+        return cls(people, distances, requested)
+
+    def vector(self, p):
+        return self.distances[p * self.count:(p + 1) * self.count]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        people `source` and `target`. lower is math.inf if they are certainly
+        not connected; upper is math.inf if no landmark reaches both.
+        """
+        if source == target:
+            return 0, 0
+        lower, upper = 0, float("inf")
+        for s, t in zip(self.vector(source), self.vector(target)):
+            if s == UNREACHABLE and t == UNREACHABLE:
+                continue
+            if s == UNREACHABLE or t == UNREACHABLE:
+                return float("inf"), float("inf")
+            lower = max(lower, abs(s - t))
+            upper = min(upper, s + t)
+        return lower, upper
+
+    def shortest_path(self, graph, source, target):
+        """
+        Returns the same kind of path as graph.shortest_path, found by A*
+        search using the landmark lower bound as its heuristic.
+        """
+        if source == target:
+            return []
+        lower, _ = self.bounds(source, target)
+        if lower == float("inf"):
+            return None
+
+        goal = self.vector(target)
+
+        def heuristic(p):
+            # Every person searched is connected to the target, so each landmark
+            # reaches both or neither, and the latter contribute 0 either way
+            return max(map(abs, map(sub, self.vector(p), goal)))
+
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+
+        # Maps each reached person to (movie, parent) and their distance from source
+        parents = {source: None}
+        cost = {source: 0}
+        done = set()
+        frontier = [(lower, 0, source)]
+        while frontier:
+            _, depth, p = heapq.heappop(frontier)
+            g = -depth
+            if p in done:
+                continue
+            if p == target:
+                return trace(parents, target)
+            done.add(p)
+            for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                    if q in done or cost.get(q, float("inf")) <= g + 1:
+                        continue
+                    cost[q] = g + 1
+                    parents[q] = (m, p)
+                    # Break ties toward deeper nodes, which are closer to the target
+                    heapq.heappush(frontier, (g + 1 + heuristic(q), -(g + 1), q))
+        return None
+
+
+def trace(parents, target):
+    """
+    Follows (movie, parent) pointers back from `target` into a path.
+    """
+    path = []
+    p = target
+    while parents[p] is not None:
+        m, parent = parents[p]
+        path.append((m, p))
+        p = parent
+    path.reverse()
+    return path
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def save(landmarks, path, stamps):
+    """
+    Write `landmarks` to `path`, tagged with the CSV `stamps` they were built from.
+    """
+    header = {"version": VERSION, "sources": stamps, "people": landmarks.people, "count": landmarks.requested}
+    snapshot.save_sections(path, MAGIC, header, [("distances", "B", landmarks.distances)])
+
+
+def load(path, stamps=None, count=None):
+    """
+    Memory-map the landmark index at `path`, or return None if it is
+    missing, from another version, built from different CSV files, or
+    (when `count` is given) built for another number of landmarks.
+    """
+    found = snapshot.load_sections(path, MAGIC, VERSION, stamps)
+    if found is None:
+        return None
+    header, views = found
+    if count is not None and header["count"] != count:
+        return None
+    return Landmarks(header["people"], views["distances"], header["count"])
+
+
+def load_cached(directory, graph, count=COUNT):
+    """
+    Returns the landmark index for `graph`, loaded from `directory`
+    if it is up to date, otherwise built (and saved) from scratch.
+    """
+    return snapshot.load_or_build(landmarks_path(directory), snapshot.source_stamps(directory),
+                                  lambda path, stamps: load(path, stamps, count),
+                                  lambda: Landmarks.build(graph, count), save)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else COUNT
+
+    print("Loading data...")
+    graph = snapshot.load_cached(directory)
+    print(f"Building {count} landmarks...")
+    landmarks = Landmarks.build(graph, count)
+    save(landmarks, landmarks_path(directory), snapshot.source_stamps(directory))
+    print(f"Wrote {landmarks_path(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Streaming CSV reading for the Degrees loaders.
+
+Rows are read with csv.reader and the wanted columns picked out by position,
+rather than building a dictionary per row as csv.DictReader does, and
+progress can be reported to stderr as the rows stream past.
+"""
+
+import csv
+import sys
+import time
+from operator import itemgetter
+
+# How many rows to read between progress reports
+PROGRESS_EVERY = 100000
+
+
+class Progress():
+    """
+    Reports rows read and rows per second for one file on a single stderr line.
+    """
+
+    def __init__(self, label, stream=sys.stderr):
+        self.label = label
+        self.stream = stream
+        self.start = time.perf_counter()
+
+    def update(self, rows, end=""):
+        seconds = time.perf_counter() - self.start
+        rate = rows / seconds if seconds > 0 else 0
+        self.stream.write(f"\r{self.label}: {rows:,} rows ({rate:,.0f} rows/sec){end}")
+        self.stream.flush()
+
+
+def read_columns(path, columns, progress=False, stats=None):
+    """
+    Yields a tuple of the values in `columns` (by header name) for each row
+    of the CSV file at `path`, reporting progress to stderr if `progress`.
+    Blank lines are skipped, as csv.DictReader skips them; rows too short
+    to hold every column are skipped too, and counted as "malformed" in
+    the `stats` Counter, if given.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        indexes = [header.index(column) for column in columns]
+        width = max(indexes) + 1
+        pick = itemgetter(*indexes) if len(indexes) > 1 else lambda row: (row[indexes[0]],)
+
+        report = Progress(path) if progress else None
+        rows = 0
+        for row in reader:
+            if len(row) < width:
+                if row and stats is not None:
+                    stats["malformed"] += 1
+                continue
+            yield pick(row)
+            rows += 1
+            if report is not None and rows % PROGRESS_EVERY == 0:
+                report.update(rows)
+        if report is not None:
+            report.update(rows, end="\n")
+
+
+def summary(stats):
+    """
+    Returns a line describing the rows counted in `stats` by a loader.
+    """
+    line = f"{stats['people']:,} people, {stats['movies']:,} movies, {stats['stars']:,} stars"
+    skipped = [
+        f"{stats[key]:,} {description}"
+        for key, description in (
+            ("unknown_person", "with an unknown person"),
+            ("unknown_movie", "with an unknown movie"),
+            ("duplicate", "duplicated")
+        )
+        if stats[key]
+    ]
+    if skipped:
+        line += f" (skipped star rows: {', '.join(skipped)})"
+    if stats["malformed"]:
+        line += f" (skipped {stats['malformed']:,} malformed rows)"
+    return line
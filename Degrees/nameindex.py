@@ -0,0 +1,207 @@
+"""
+Prefix and typo-tolerant person name lookup for Degrees.
+
+Names are searched two ways:
+    - by prefix, with a binary search over the names in sorted order;
+    - by similarity, with a trigram index: every three-character window
+      of each padded, lowercase name maps to the people whose names contain
+      it, so names sharing many trigrams with a misspelled query are found
+      without scanning every name.
+
+The trigram postings are kept as CSR arrays, like the graph, and cached
+next to the CSV files for the compact graph.
+"""
+
+import os
+import sys
+from array import array
+from collections import Counter
+
+import snapshot
+from graph import StringTable, bisect_order, build_csr, sorted_order
+
+MAGIC = b"DEGNAME\n"
+VERSION = 1
+FILENAME = "degrees.names"
+
+# Only the rarest few trigrams of a query are used to gather candidates
+PROBES = 6
+
+# Candidates with a lower Dice similarity to the query are dropped
+THRESHOLD = 0.4
+
+# Scores for exact and prefix matches, above any similarity score
+EXACT = 3.0
+PREFIX = 2.0
+
+
+def normalize(name):
+    return " ".join(name.lower().split())
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams in a normalized name, padded so that
+    the start and end of the name count too.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Search index over a sequence of names. Results are indexes into it.
+    """
+
+    def __init__(self, names, order, grams, offsets, postings):
+        self.names = names
+        # Indexes of `names` sorted by normalized name
+        self.order = order
+        # Sorted StringTable of every trigram, and the CSR postings
+        # listing the names containing grams[i] in postings[offsets[i]:offsets[i + 1]]
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def build(cls, names, order=None):
+        """
+        Index the sequence `names`. `order` may pass in the indexes
+        of `names` already sorted by lowercase name.
+        """
+        if order is None:
+            order = sorted_order(names, normalize)
+
+        gram_ids = {}
+        rows = array("i")
+        columns = array("i")
+        for i in range(len(names)):
+            for gram in trigrams(normalize(names[i])):
+                rows.append(gram_ids.setdefault(gram, len(gram_ids)))
+                columns.append(i)
+
+        # Renumber trigrams in sorted order so they can be binary searched
+        sorted_grams = sorted(gram_ids)
+        renumber = array("i", bytes(4 * len(sorted_grams)))
+        for new, gram in enumerate(sorted_grams):
+            renumber[gram_ids[gram]] = new
+        rows = array("i", (renumber[row] for row in rows))
+
+        offsets, postings = build_csr(rows, columns, len(sorted_grams))
+        return cls(names, order, StringTable.from_strings(sorted_grams), offsets, postings)
+
+    def posting(self, gram):
+        """
+        Returns the indexes of every name containing trigram `gram`.
+        """
+        order = range(len(self.grams))
+        i = bisect_order(self.grams, order, gram)
+        if i == len(self.grams) or self.grams[i] != gram:
+            return self.postings[0:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def prefixed(self, prefix, limit):
+        """
+        Returns up to `limit` indexes of names starting with `prefix`, in sorted order.
+        """
+        i = bisect_order(self.names, self.order, prefix, normalize)
+        matches = []
+        while i < len(self.order) and len(matches) < limit:
+            if not normalize(self.names[self.order[i]]).startswith(prefix):
+                break
+            matches.append(self.order[i])
+            i += 1
+        return matches
+
+    def similar(self, query, limit):
+        """
+        Returns up to `limit` (index, similarity) pairs for the names most
+        similar to `query`, by Dice coefficient over their trigrams.
+        """
+        query_grams = trigrams(query)
+        postings = sorted((self.posting(gram) for gram in query_grams), key=len)
+
+        # Names sharing the most of the query's rarest trigrams are candidates
+        counts = Counter()
+        for posting in postings[:PROBES]:
+            counts.update(posting)
+        candidates = [i for i, _ in counts.most_common(limit * 10)]
+
+        scored = []
+        for i in candidates:
+            name_grams = trigrams(normalize(self.names[i]))
+            score = 2 * len(query_grams & name_grams) / (len(query_grams) + len(name_grams))
+            if score >= THRESHOLD:
+                scored.append((i, score))
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` (index, score) pairs of names matching `query`,
+        best first: exact matches, then prefix matches, then similar names.
+        """
+        query = normalize(query)
+        results = {}
+        for i in self.prefixed(query, limit):
+            results[i] = EXACT if normalize(self.names[i]) == query else PREFIX
+        if len(results) < limit:
+            for i, score in self.similar(query, limit):
+                results.setdefault(i, score)
+        ranked = sorted(results.items(), key=lambda pair: pair[1], reverse=True)
+        return ranked[:limit]
+
+
+def names_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def save(index, path, stamps):
+    """
+    Write the trigram index (but not the names) to `path`, tagged with the CSV `stamps`.
+    """
+    snapshot.save_sections(path, MAGIC, {"version": VERSION, "sources": stamps}, [
+        ("order", "i", index.order),
+        ("grams.blob", "B", index.grams.blob),
+        ("grams.offsets", "q", index.grams.offsets),
+        ("offsets", "i", index.offsets),
+        ("postings", "i", index.postings)
+    ])
+
+
+def load(path, names, stamps=None):
+    """
+    Memory-map the trigram index at `path` for the sequence `names`,
+    or return None if it is missing, stale, or from another version.
+    """
+    found = snapshot.load_sections(path, MAGIC, VERSION, stamps)
+    if found is None:
+        return None
+    views = found[1]
+    grams = StringTable(views["grams.blob"], views["grams.offsets"])
+    return NameIndex(names, views["order"], grams, views["offsets"], views["postings"])
+
+
+def load_cached(directory, graph):
+    """
+    Returns the name index for the compact `graph`, loaded from `directory`
+    if it is up to date, otherwise built (and saved) from scratch.
+    """
+    return snapshot.load_or_build(names_path(directory), snapshot.source_stamps(directory),
+                                  lambda path, stamps: load(path, graph.names, stamps),
+                                  lambda: NameIndex.build(graph.names), save)
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python nameindex.py directory name...")
+    directory = sys.argv[1]
+
+    graph = snapshot.load_cached(directory)
+    index = load_cached(directory, graph)
+    for p, score in index.search(" ".join(sys.argv[2:])):
+        print(f"{score:.2f}  ID: {graph.person_ids[p]}, Name: {graph.names[p]}, Birth: {graph.births[p]}")
+
+
+if __name__ == "__main__":
+    main()
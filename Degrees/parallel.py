@@ -0,0 +1,70 @@
+"""
+Run many shortest-path queries across a pool of worker processes.
+
+The compact graph is copied once into a block of shared memory, and each
+worker attaches to that block and views the arrays in place, so the graph
+is never pickled or copied per worker.
+"""
+
+import os
+from multiprocessing import Pool, shared_memory
+
+import snapshot
+
+# Set in each worker process by attach
+worker_graph = None
+worker_memory = None
+
+
+class SharedGraph():
+    """
+    A Graph's arrays packed into one named shared memory block.
+    """
+
+    def __init__(self, graph):
+        self.layout, buffers, size = snapshot.pack(snapshot.graph_sections(graph))
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for offset, data in buffers:
+            self.memory.buf[offset:offset + len(data)] = data
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(name, layout):
+    """
+    Pool initializer: view the shared graph from inside a worker process.
+    """
+    global worker_graph, worker_memory
+    worker_memory = shared_memory.SharedMemory(name=name)
+    worker_graph = snapshot.graph_from_sections(snapshot.unpack(worker_memory.buf, layout))
+
+
+def solve(query):
+    """
+    Answers one (source, target, bidirectional) query of person indexes in a worker.
+    """
+    source, target, bidirectional = query
+    if bidirectional:
+        return worker_graph.bidirectional_path(source, target)
+    return worker_graph.shortest_path(source, target)
+
+
+def parallel_paths(graph, pairs, processes=None, bidirectional=False, chunksize=16):
+    """
+    Yields the shortest path (as from Graph.shortest_path) for each
+    (source, target) pair of person indexes, in order, computed by
+    `processes` workers (default: one per CPU).
+    """
+    processes = processes or os.cpu_count()
+    queries = ((source, target, bidirectional) for source, target in pairs)
+    with SharedGraph(graph) as shared:
+        with Pool(processes, initializer=attach, initargs=(shared.memory.name, shared.layout)) as pool:
+            yield from pool.imap(solve, queries, chunksize)
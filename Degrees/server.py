@@ -0,0 +1,142 @@
+"""
+Long-lived local HTTP server answering Degrees queries from one loaded dataset.
+
+    GET  /path?source=NAME&target=NAME[&alternatives=N] -> one JSON result
+    GET  /bounds?source=NAME&target=NAME -> bounds on the degrees of separation
+                                            (needs --landmarks)
+    GET  /people?name=NAME[&limit=N]     -> people matching a partial or misspelled name
+    POST /batch with queries as in batch.py -> JSON lines, one per query
+"""
+
+import io
+import json
+import math
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import batch
+import degrees
+import loader
+
+USAGE = "Usage: python server.py [--compact] [--bidirectional] [--landmarks] [--alt] directory [port]"
+HOST = "127.0.0.1"
+PORT = 8050
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # Set by main from the command-line flags
+    bidirectional = False
+    alt = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/people":
+            if "name" not in query:
+                self.send_error(400, "Expected a name parameter")
+                return
+            limit = parameter(query, "limit", 10)
+            if limit is None:
+                self.send_error(400, "Expected a non-negative integer limit")
+                return
+            result = degrees.search_people(query["name"][0], limit)
+            self.respond("application/json", json.dumps(result) + "\n")
+            return
+        if url.path not in ("/path", "/bounds") or (url.path == "/bounds" and degrees.landmark_index is None):
+            self.send_error(404)
+            return
+        if "source" not in query or "target" not in query:
+            self.send_error(400, "Expected source and target parameters")
+            return
+        if url.path == "/path":
+            alternatives = parameter(query, "alternatives", 0)
+            if alternatives is None:
+                self.send_error(400, "Expected a non-negative integer number of alternatives")
+                return
+            result = batch.answer(query["source"][0], query["target"][0], self.bidirectional, alternatives,
+                                  self.alt)
+        else:
+            result = bounds(query["source"][0], query["target"][0])
+        self.respond("application/json", json.dumps(result) + "\n")
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/batch":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, "Expected a non-negative integer Content-Length")
+            return
+        lines = self.rfile.read(length).decode("utf-8").splitlines()
+        output = io.StringIO()
+        batch.run(lines, output, self.bidirectional, self.alt)
+        self.respond("application/jsonl", output.getvalue())
+
+    def respond(self, content_type, body):
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def parameter(query, name, default):
+    """
+    Returns the non-negative integer query parameter `name`, `default` if
+    it is absent, or None if it is not a non-negative integer.
+    """
+    if name not in query:
+        return default
+    try:
+        value = int(query[name][0])
+    except ValueError:
+        return None
+    return value if value >= 0 else None
+
+
+def bounds(source_name, target_name):
+    """
+    Returns a JSON-serializable dictionary with the landmark bounds
+    "at_least" and "at_most" (None if unknown) between two names.
+    """
+    result, person_ids = batch.resolve(source_name, target_name)
+    if person_ids is None:
+        return result
+    lower, upper = degrees.distance_bounds(*person_ids)
+    result["at_least"] = lower if lower != math.inf else None
+    result["at_most"] = upper if upper != math.inf else None
+    result["connected"] = lower != math.inf
+    return result
+
+
+def main():
+    args, flags = batch.parse_args(sys.argv[1:], USAGE)
+    if len(args) not in (1, 2):
+        sys.exit(USAGE)
+    port = int(args[1]) if len(args) == 2 else PORT
+
+    print("Loading data...")
+    stats = degrees.load(args[0], compact="--compact" in flags,
+                         use_landmarks="--landmarks" in flags or "--alt" in flags, progress=True)
+    print("Data loaded.")
+    if stats:
+        print(loader.summary(stats))
+
+    QueryHandler.bidirectional = "--bidirectional" in flags
+    QueryHandler.alt = "--alt" in flags
+    server = ThreadingHTTPServer((HOST, port), QueryHandler)
+    print(f"Serving on http://{HOST}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Binary snapshots of the compact Degrees graph.
+
+A snapshot is built once from the CSV files and stores every array and
+string table of a Graph in one file, so later runs can memory-map it
+instead of parsing the CSVs again. It is reused automatically for as long
+as the size and modification time of each CSV file are unchanged.
+
+File layout (shared with the other cached indexes, via save_sections):
+    a magic number, then a little-endian uint32 header length, then a JSON
+    header (version, byte order, CSV stamps, and the offset, type and length
+    of each section), then the sections themselves, each aligned to 8 bytes.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, StringTable
+
+MAGIC = b"DEGSNAP\n"
+VERSION = 1
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored as plain arrays
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "person_order", "movie_order", "name_order")
+
+# Graph attributes stored as string tables (a blob plus an offsets array)
+TABLES = ("person_ids", "names", "births", "movie_ids", "titles", "years")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the [size, mtime_ns] of each CSV file, used to detect stale snapshots.
+    """
+    stamps = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def graph_sections(graph):
+    """
+    Yields (name, typecode, buffer) for every section of `graph`.
+    """
+    for name in ARRAYS:
+        values = getattr(graph, name)
+        yield name, values.typecode if isinstance(values, array) else values.format, values
+    for name in TABLES:
+        table = getattr(graph, name)
+        yield f"{name}.blob", "B", table.blob
+        yield f"{name}.offsets", "q", table.offsets
+
+
+def graph_from_sections(views):
+    """
+    Returns a Graph whose arrays are the given section views, by name.
+    """
+    fields = {name: views[name] for name in ARRAYS}
+    for name in TABLES:
+        fields[name] = StringTable(views[f"{name}.blob"], views[f"{name}.offsets"])
+    return Graph(**fields)
+
+
+def pack(sections):
+    """
+    Lays out (name, typecode, buffer) sections end to end, each aligned to 8 bytes.
+
+    Returns (layout, buffers, size): the [offset, typecode, length] of each
+    section by name, (offset, bytes) pairs to write, and the total size.
+    """
+    layout = {}
+    position = 0
+    buffers = []
+    for name, typecode, values in sections:
+        data = memoryview(values).cast("B")
+        position += -position % 8
+        layout[name] = [position, typecode, len(data)]
+        buffers.append((position, data))
+        position += len(data)
+    return layout, buffers, position
+
+
+def unpack(buffer, layout):
+    """
+    Returns a dictionary of typed views into `buffer`, laid out as by pack.
+    """
+    views = {}
+    for name, (offset, typecode, length) in layout.items():
+        views[name] = buffer[offset:offset + length].cast(typecode)
+    return views
+
+
+def save_sections(path, magic, header, sections):
+    """
+    Write `sections` to `path` after `magic` and a JSON `header`,
+    to which the byte order and section layout are added.
+    """
+    layout, buffers, _ = pack(sections)
+    header = json.dumps(dict(header, byteorder=sys.byteorder, sections=layout)).encode("utf-8")
+    start = len(magic) + 4 + len(header)
+    start += -start % 8
+
+    # Write to a temporary file first so readers never see a partial file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(magic)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for offset, data in buffers:
+                f.seek(start + offset)
+                f.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def load_sections(path, magic, version, stamps=None):
+    """
+    Memory-map a file written by save_sections and return (header, views).
+
+    Returns None if the file is missing, has another magic number, version
+    or byte order, or (when `stamps` is given) was built from different CSV files.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if f.read(len(magic)) != magic:
+            return None
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+        if header["version"] != version or header["byteorder"] != sys.byteorder:
+            return None
+        if stamps is not None and header["sources"] != stamps:
+            return None
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    start = len(magic) + 4 + length
+    start += -start % 8
+    return header, unpack(buffer[start:], header["sections"])
+
+
+def load_or_build(path, stamps, load, build, save):
+    """
+    Returns load(path, stamps) if that finds a file built from the CSV
+    files with these `stamps`, otherwise build(), saved with save(built,
+    path, stamps) unless the directory is read-only.
+    """
+    found = load(path, stamps)
+    if found is not None:
+        return found
+
+    built = build()
+    try:
+        save(built, path, stamps)
+    except OSError:
+        pass  # Read-only data directory; just skip caching
+    return built
+
+
+def save(graph, path, stamps):
+    """
+    Write `graph` to a snapshot file at `path`, tagged with the CSV `stamps`.
+    """
+    save_sections(path, MAGIC, {"version": VERSION, "sources": stamps}, graph_sections(graph))
+
+
+def load(path, stamps=None):
+    """
+    Memory-map the snapshot at `path` and return a Graph backed by it.
+
+    Returns None if the file is missing, from another version or byte order,
+    or (when `stamps` is given) was built from different CSV files.
+    """
+    found = load_sections(path, MAGIC, VERSION, stamps)
+    if found is None:
+        return None
+    return graph_from_sections(found[1])
+
+
+def load_cached(directory, progress=False, stats=None):
+    """
+    Returns the Graph for the CSV files in `directory`, from its snapshot
+    if that is up to date, otherwise from the CSVs (refreshing the snapshot,
+    and passing `progress` and `stats` on to Graph.from_csv).
+    """
+    return load_or_build(snapshot_path(directory), source_stamps(directory), load,
+                         lambda: Graph.from_csv(directory, progress, stats), save)
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    directory = sys.argv[1]
+
+    print("Building snapshot...")
+    graph = Graph.from_csv(directory, progress=True)
+    save(graph, snapshot_path(directory), source_stamps(directory))
+    print(f"Wrote {snapshot_path(directory)}: "
+          f"{graph.num_people} people, {graph.num_movies} movies.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from collections import Counter, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier holding each state, for O(1) contains_state
+        self.states = Counter()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] += 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return self.states[state] > 0
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +28,15 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.forget(node)
             return node
 
+    def forget(self, node):
+        self.states[node.state] -= 1
+        if self.states[node.state] == 0:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +44,130 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.forget(node)
             return node
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Breadth-first search from both `source` and `target` at once, always
+    expanding whichever frontier is smaller by one full layer.
+
+    `neighbors(state)` returns (action, state) pairs; the graph must be
+    undirected. Returns the shortest list of (action, state) pairs leading
+    from source to target, or None if they are not connected.
+    """
+    if source == target:
+        return []
+
+    # Maps each state seen from one side to the (action, state) it was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            layer, parents, others = forward_layer, forward, backward
+        else:
+            layer, parents, others = backward_layer, backward, forward
+
+        next_layer = []
+        for state in layer:
+            for action, neighbor in neighbors(state):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (action, state)
+                if neighbor in others:
+                    return splice_path(forward, backward, neighbor)
+                next_layer.append(neighbor)
+
+        if parents is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+    return None
+
+
+def splice_path(forward, backward, meeting):
+    """
+    Joins the forward and backward parent maps of bidirectional_search
+    into one list of (action, state) pairs passing through `meeting`.
+    """
+    path = []
+    state = meeting
+    while forward[state] is not None:
+        action, parent = forward[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+
+    state = meeting
+    while backward[state] is not None:
+        action, child = backward[state]
+        path.append((action, child))
+        state = child
+    return path
+
+
+def all_shortest_paths(source, target, neighbors):
+    """
+    Yields every shortest list of (action, state) pairs leading from
+    `source` to `target`, one at a time, or nothing if they are not connected.
+
+    A breadth-first search from `source` first records the depth of each
+    state up to the target's layer. Those layers form a DAG in which every
+    state at depth k has predecessors at depth k - 1, so the paths are then
+    enumerated by walking back from the target without searching again.
+    `neighbors` must be undirected, as in bidirectional_search.
+    """
+    if source == target:
+        yield []
+        return
+
+    depth = {source: 0}
+    layer = [source]
+    found = False
+    while layer and not found:
+        next_layer = []
+        for state in layer:
+            for _, neighbor in neighbors(state):
+                if neighbor not in depth:
+                    depth[neighbor] = depth[state] + 1
+                    next_layer.append(neighbor)
+                    found = found or neighbor == target
+        layer = next_layer
+    if not found:
+        return
+
+    # Predecessors of each state in the DAG, computed when first needed
+    predecessors = {}
+
+    def parents(state):
+        if state not in predecessors:
+            predecessors[state] = [
+                (action, neighbor) for action, neighbor in neighbors(state)
+                if depth.get(neighbor) == depth[state] - 1
+            ]
+        return predecessors[state]
+
+    # Depth-first walk back from the target; `path` holds the pairs so far, reversed
+    path = []
+    stack = [iter(parents(target))]
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            if path:
+                path.pop()
+            continue
+        action, parent = step
+        # The action joins parent to the state whose predecessors are being walked
+        child = path[-1][1] if path else target
+        path.append((action, parent, child))
+        if parent == source:
+            yield [(action, child) for action, _, child in reversed(path)]
+            path.pop()
+        else:
+            stack.append(iter(parents(parent)))
@@ -0,0 +1,167 @@
+"""
+Benchmark and accuracy harness for the PageRank methods.
+
+Generates synthetic corpora with power-law link graphs (a few pages are
+linked to by many, most by few, and some pages have no links), then runs
+each method on them and reports, for each setting:
+    - wall time;
+    - peak memory allocated, traced in a second, separate run, since
+      tracing slows the pure-Python methods down several times over;
+    - L1 error against a reference computed to a tolerance of 1e-14.
+
+The methods are sample_pagerank and iterate_pagerank from pagerank.py,
+the vectorized sampler, Monte Carlo walks and the sparse engine. The
+pure-Python methods are only run where they finish in reasonable time:
+their cost grows with the number of pages times the number of samples,
+or pages squared.
+
+Usage:
+    python benchmark.py [--json] [--no-memory] [pages ...]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import montecarlo
+import pagerank
+import sampler
+import sparse
+
+DAMPING = pagerank.DAMPING
+PAGES = (100, 1000, 100000)
+SAMPLES = (1000, 10000, 100000, 1000000)
+WIDTHS = (0.3, 0.1)
+
+# Average links per page, the power-law exponent of how often each page is
+# linked to, and the share of pages with no links
+LINKS = 8
+EXPONENT = 1.2
+DANGLING = 0.05
+
+# Largest pages * samples for sample_pagerank, and pages for iterate_pagerank
+SAMPLE_BUDGET = 10 ** 7
+ITERATE_PAGES = 1000
+
+USAGE = "Usage: python benchmark.py [--json] [--no-memory] [pages ...]"
+
+
+def synthetic_corpus(pages, links=LINKS, exponent=EXPONENT, dangling=DANGLING, seed=0):
+    """
+    Returns a corpus dictionary, as from crawl, of `pages` pages with about
+    `links` links each, to pages chosen with probability falling off as a
+    power law of their popularity rank, and a `dangling` share without links.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"{i}.html" for i in range(pages)]
+    popularity = 1 / np.arange(1, pages + 1) ** exponent
+    popularity = rng.permutation(popularity / popularity.sum())
+
+    counts = rng.poisson(links, pages)
+    counts[rng.random(pages) < dangling] = 0
+    destinations = rng.choice(pages, size=int(counts.sum()), p=popularity)
+
+    corpus = {}
+    offset = 0
+    for i, name in enumerate(names):
+        targets = destinations[offset:offset + counts[i]]
+        offset += counts[i]
+        corpus[name] = {names[j] for j in targets if j != i}
+    return corpus
+
+
+def reference(corpus):
+    """
+    Returns the PageRank of `corpus` to an L1 tolerance of 1e-14, as an array in corpus order.
+    """
+    links = sparse.LinkMatrix.from_corpus(corpus)
+    ranks, _ = sparse.solve(links, DAMPING, tolerance=1e-14, norm="l1", max_iterations=10 ** 5)
+    return ranks
+
+
+def l1_error(ranks, expected, corpus):
+    return float(sum(abs(ranks[page] - expected[i]) for i, page in enumerate(corpus)))
+
+
+def measure(function, memory=True):
+    """
+    Returns (result, seconds, peak bytes) for calling `function`: timed in
+    one run and, if `memory`, traced in another (else peak bytes is None).
+    """
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def trials(pages, samples=SAMPLES):
+    """
+    Yields (method, setting, function) for each method to run on a corpus of `pages` pages.
+    """
+    for n in samples:
+        if pages * n <= SAMPLE_BUDGET:
+            yield "sample_pagerank", f"n={n}", lambda corpus, n=n: pagerank.sample_pagerank(corpus, DAMPING, n)
+        yield "vectorized", f"n={n}", lambda corpus, n=n: sampler.vectorized_pagerank(corpus, DAMPING, n, seed=0)
+    for width in WIDTHS:
+        yield "monte_carlo", f"width={width:g}", \
+            lambda corpus, width=width: montecarlo.monte_carlo_pagerank(corpus, DAMPING, width, seed=0)
+    if pages <= ITERATE_PAGES:
+        yield "iterate_pagerank", "tol=1e-3", lambda corpus: pagerank.iterate_pagerank(corpus, DAMPING)
+    for tolerance in (1e-3, 1e-6, 1e-9):
+        yield "sparse", f"tol={tolerance:g}", \
+            lambda corpus, tolerance=tolerance: sparse.sparse_pagerank(corpus, DAMPING, tolerance)
+
+
+def run(sizes=PAGES, samples=SAMPLES, memory=True):
+    """
+    Yields a result dictionary for every method and setting on a synthetic corpus of each of `sizes`.
+    """
+    for pages in sizes:
+        corpus = synthetic_corpus(pages)
+        expected = reference(corpus)
+        for method, setting, function in trials(pages, samples):
+            ranks, seconds, peak = measure(lambda: function(corpus), memory)
+            yield {
+                "pages": pages,
+                "links": sum(len(links) for links in corpus.values()),
+                "method": method,
+                "setting": setting,
+                "seconds": seconds,
+                "peak_bytes": peak,
+                "l1_error": l1_error(ranks, expected, corpus)
+            }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    if flags - {"--json", "--no-memory"}:
+        sys.exit(USAGE)
+    sizes = [int(arg) for arg in args] or PAGES
+
+    results = run(sizes, memory="--no-memory" not in flags)
+    if "--json" in flags:
+        print(json.dumps(list(results), indent=2))
+        return
+
+    print(f"{'pages':>8}{'links':>10}  {'method':<18}{'setting':<12}{'seconds':>10}{'peak MB':>10}{'L1 error':>12}")
+    for result in results:
+        peak = f"{result['peak_bytes'] / 1e6:.1f}" if result["peak_bytes"] is not None else "-"
+        print(f"{result['pages']:>8}{result['links']:>10}  {result['method']:<18}{result['setting']:<12}"
+              f"{result['seconds']:>10.3f}{peak:>10}{result['l1_error']:>12.2e}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
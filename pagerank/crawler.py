@@ -0,0 +1,165 @@
+"""
+Parallel, incremental crawler for PageRank corpora.
+
+Builds the same corpus dictionary as crawl in pagerank.py, but:
+    - reads each HTML file in chunks, extracting links as it goes rather
+      than holding the whole file in memory;
+    - parses files across a pool of worker processes;
+    - caches each file's links in the corpus directory, keyed by the
+      file's size and modification time, so that re-crawling a mostly
+      unchanged corpus only re-parses the files that changed.
+"""
+
+import json
+import os
+import re
+import sys
+from collections import Counter
+from multiprocessing import Pool
+
+# The same pattern as crawl in pagerank.py
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Characters read from a file at a time
+CHUNK = 1 << 16
+
+# Fewer changed files than this are parsed in this process, without a pool
+PARALLEL_MIN = 64
+
+FILENAME = "pagerank.links"
+VERSION = 1
+
+USAGE = "Usage: python crawler.py [--no-cache] corpus"
+
+
+def extract_links(path, chunk_size=CHUNK):
+    """
+    Returns the set of links in the HTML file at `path`, read `chunk_size`
+    characters at a time. Text from the last unfinished tag of each chunk
+    is carried over to the next, so links split across chunks are found.
+    """
+    links = set()
+    buffer = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+            if not chunk:
+                return links
+            start = buffer.rfind("<", end)
+            buffer = buffer[start:] if start != -1 else ""
+
+
+def parse(entry):
+    """
+    Pool worker: returns (filename, links) for one (directory, filename) pair.
+    """
+    directory, filename = entry
+    return filename, extract_links(os.path.join(directory, filename))
+
+
+def cache_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def load_cache(directory):
+    """
+    Returns the cached {filename: {"size", "mtime_ns", "links"}} for `directory`,
+    or an empty dictionary if there is no usable cache.
+    """
+    try:
+        with open(cache_path(directory), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def save_cache(directory, files):
+    """
+    Writes the per-file cache for `directory`, replacing any previous one
+    only once the new one is complete.
+    """
+    path = cache_path(directory)
+    temporary = path + ".tmp"
+    try:
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "files": files}, f)
+        os.replace(temporary, path)
+    except OSError:
+        # A read-only corpus can still be crawled, just not cached
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def crawl(directory, processes=None, use_cache=True, stats=None):
+    """
+    Parse a directory of HTML pages and check for links to other pages,
+    returning the same dictionary as crawl in pagerank.py.
+
+    Files whose size and modification time match the cache are not re-read;
+    the rest are parsed by `processes` workers (default: one per CPU).
+    If `stats` is given, counts files "parsed", "cached" and "removed" in it.
+    """
+    stats = stats if stats is not None else Counter()
+    cached = load_cache(directory) if use_cache else {}
+
+    files = {}
+    changed = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            previous = cached.get(entry.name)
+            if previous is not None and previous["size"] == stamp["size"] and previous["mtime_ns"] == stamp["mtime_ns"]:
+                files[entry.name] = previous
+                stats["cached"] += 1
+            else:
+                files[entry.name] = stamp
+                changed.append(entry.name)
+    stats["parsed"] += len(changed)
+    stats["removed"] += len(cached.keys() - files.keys())
+
+    work = [(directory, filename) for filename in changed]
+    if len(work) >= PARALLEL_MIN and (processes or os.cpu_count() or 1) > 1:
+        with Pool(processes) as pool:
+            results = list(pool.imap_unordered(parse, work, chunksize=16))
+    else:
+        results = map(parse, work)
+    for filename, links in results:
+        files[filename]["links"] = sorted(links)
+
+    if use_cache and (changed or stats["removed"]):
+        save_cache(directory, files)
+
+    # Only include links to other pages in the corpus
+    return {
+        filename: set(link for link in entry["links"] if link in files) - {filename}
+        for filename, entry in files.items()
+    }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    if len(args) != 1 or flags - {"--no-cache"}:
+        sys.exit(USAGE)
+    stats = Counter()
+    corpus = crawl(args[0], use_cache="--no-cache" not in flags, stats=stats)
+    links = sum(len(links) for links in corpus.values())
+    print(f"{len(corpus):,} pages, {links:,} links "
+          f"({stats['parsed']:,} files parsed, {stats['cached']:,} cached, {stats['removed']:,} removed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Incremental PageRank updates after corpus edits.
+
+After a few pages change, the previous ranks are already close to the new
+ones, so rather than iterating from uniform ranks the update starts from
+them and works on the residual, how far each page is from satisfying
+
+    rank = (1 - d) / N + d * (rank received from links)
+
+Pushing a page's residual adds it to the page's rank and passes d times it
+on along the page's links (or evenly to every page, for a page with no
+links), which only changes the residuals of the pages it links to. Each
+round pushes, at once with NumPy, the pages on a worklist: those whose
+residual changed in the last round and is now at least tolerance / 2N.
+The residual left then sums to less than the tolerance, which bounds the
+total error in the ranks by tolerance / (1 - d). While the worklist is
+small, the residual pushed is summed by sorting the pages it reaches;
+once it reaches a good part of the corpus, one bincount over all pages
+is cheaper.
+
+The part of the residual that is the same for every page (from pages
+without links, and from a change in the number of pages) is kept as one
+number, and only spread over the pages, in a sweep over all of them, once
+it adds up to half the tolerance.
+
+relink_pagerank applies an edit to a LinkMatrix by splicing the edited
+pages' links into its arrays, and computes the starting residual only for
+the pages whose incoming links changed; for every other page it is the
+uniform part alone, as the previous ranks are taken to be converged. Its
+remaining O(N) work is a pass over the page names and a few whole-array
+NumPy operations once per edit (copying the link arrays, scaling the
+ranks, summing the rank of pages without links), and only the rounds
+whose pushes have spread over a good part of the corpus, or that spread
+the uniform residual, touch every page. incremental_pagerank takes
+any edited corpus, including removed pages, but rebuilds the LinkMatrix
+and computes the starting residual in a full sweep.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from sparse import TOLERANCE, LinkMatrix
+
+# A round pushing along at least N / DENSE links adds them up with one
+# bincount over all pages, rather than by sorting their destinations
+DENSE = 16
+
+
+def warm_start(pages, ranks, links):
+    """
+    Returns a starting rank vector for the LinkMatrix `links` from the
+    previous `ranks` of `pages`: pages new to the corpus start at 1 / N,
+    and the whole vector is scaled to sum to 1.
+    """
+    previous = dict(zip(pages, ranks))
+    start = np.array([previous.get(page, 1 / len(links)) for page in links.pages], dtype=np.float64)
+    total = start.sum()
+    return start / total if total > 0 else np.full(len(links), 1 / len(links))
+
+
+def residual(links, ranks, damping_factor):
+    """
+    Returns how far each page's rank is from one PageRank sweep of `ranks`.
+    """
+    return links.step(ranks, damping_factor) - ranks
+
+
+def gather(indptr, rows, values):
+    """
+    Returns (positions, gathered): the entries of CSR `values` in each of
+    `rows`, with the position in `rows` of the row each came from.
+    """
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    edges = np.arange(int(lengths.sum())) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+    return np.repeat(np.arange(len(rows)), lengths), values[edges]
+
+
+def outgoing(links, active):
+    """
+    Returns (sources, destinations): the links out of the `active` pages,
+    with sources given as positions in `active`.
+    """
+    return gather(links.out_indptr, active, links.targets)
+
+
+def push(links, ranks, residuals, damping_factor, tolerance=TOLERANCE, stats=None, active=None, uniform=0.0):
+    """
+    Pushes residual out along links until no page's residual is
+    `tolerance` / 2N or more, and the `uniform` residual shared by every
+    page on top of `residuals` adds up to less than `tolerance` / 2,
+    updating `ranks` and `residuals` in place, and returns `ranks`.
+
+    `active` lists every page whose residual may be over the threshold;
+    by default all pages are checked. If `stats` is given, counts
+    "rounds", "pushes", "links" pushed along and "spreads" of the uniform
+    residual over all pages in it.
+    """
+    stats = stats if stats is not None else Counter()
+    n = len(links)
+    threshold = tolerance / (2 * n)
+    if active is None:
+        active = np.flatnonzero(np.abs(residuals) >= threshold)
+    else:
+        active = np.unique(active)
+        active = active[np.abs(residuals[active]) >= threshold]
+    while True:
+        if not len(active):
+            if abs(uniform) * n < tolerance / 2:
+                return ranks
+            # Spread the uniform residual over every page, in one sweep
+            stats["spreads"] += 1
+            residuals += uniform
+            uniform = 0.0
+            active = np.flatnonzero(np.abs(residuals) >= threshold)
+            continue
+        stats["rounds"] += 1
+        stats["pushes"] += len(active)
+
+        pushed = residuals[active]
+        ranks[active] += pushed
+        residuals[active] = 0
+
+        dangling = links.dangling[active]
+        uniform += damping_factor * pushed[dangling].sum() / n
+
+        sources, destinations = outgoing(links, active[~dangling])
+        if not len(destinations):
+            active = destinations
+            continue
+        stats["links"] += len(destinations)
+        share = pushed[~dangling] / links.out_degree[active[~dangling]]
+        if len(destinations) * DENSE >= n:
+            residuals += damping_factor * np.bincount(destinations, weights=share[sources], minlength=n)
+            active = np.flatnonzero(np.abs(residuals) >= threshold)
+        else:
+            touched, inverse = np.unique(destinations, return_inverse=True)
+            residuals[touched] += damping_factor * np.bincount(inverse, weights=share[sources])
+            active = touched[np.abs(residuals[touched]) >= threshold]
+
+
+def update(links, ranks, damping_factor, tolerance=TOLERANCE, stats=None):
+    """
+    Returns the PageRank vector of the LinkMatrix `links`, starting from
+    the nearby vector `ranks` (such as a warm_start from before an edit).
+    """
+    ranks = np.array(ranks, dtype=np.float64)
+    return push(links, ranks, residual(links, ranks, damping_factor), damping_factor, tolerance, stats)
+
+
+def relink(links, changes):
+    """
+    Returns (links, affected): the LinkMatrix `links` after the edit
+    `changes`, a dictionary mapping each page whose links changed, or that
+    is new (and is added at the end), to the pages it now links to, and
+    the numbers of the pages whose incoming links changed. As in crawl,
+    links to the page itself, or to pages not in the corpus, are ignored.
+    """
+    pages = list(links.pages)
+    named = set(changes).union(*changes.values())
+    index = {page: i for i, page in enumerate(pages) if page in named}
+    for page in changes:
+        if page not in index:
+            index[page] = len(pages)
+            pages.append(page)
+    old_n, n = len(links), len(pages)
+
+    edited = np.array(sorted(index[page] for page in changes), dtype=np.int64)
+    new_targets = [
+        np.array(sorted({index[link] for link in changes[pages[p]] if link in index and link != pages[p]}),
+                 dtype=links.targets.dtype)
+        for p in edited
+    ]
+
+    # Links by source: splice each edited page's new targets in for its old ones
+    out_indptr = np.concatenate((links.out_indptr, np.full(n - old_n, links.out_indptr[-1])))
+    pieces, removed, end = [], [], 0
+    for p, targets in zip(edited, new_targets):
+        start, stop = out_indptr[p], out_indptr[p + 1]
+        pieces.extend((links.targets[end:start], targets))
+        removed.append(links.targets[start:stop])
+        end = stop
+    pieces.append(links.targets[end:])
+    degree = np.diff(out_indptr)
+    degree[edited] = [len(targets) for targets in new_targets]
+    out_indptr = np.concatenate(([0], np.cumsum(degree)))
+    removed = np.concatenate(removed) if removed else np.zeros(0, dtype=np.int64)
+    added = np.concatenate(new_targets) if new_targets else np.zeros(0, dtype=np.int64)
+
+    # Links by destination: drop the edited pages' old links, then insert
+    # their new ones at the end of each destination's row
+    in_counts = np.concatenate((np.diff(links.indptr), np.zeros(n - old_n, dtype=np.int64)))
+    is_edited = np.zeros(n, dtype=bool)
+    is_edited[edited] = True
+    kept = links.sources[~is_edited[links.sources]]
+    kept_counts = in_counts - np.bincount(removed, minlength=n)
+    kept_indptr = np.concatenate(([0], np.cumsum(kept_counts)))
+    added_sources = np.repeat(edited, [len(targets) for targets in new_targets]).astype(links.sources.dtype)
+    # Links inserted at the same place (after empty rows) go in by destination
+    order = np.argsort(added, kind="stable")
+    sources = np.insert(kept, kept_indptr[added[order] + 1], added_sources[order])
+    indptr = np.concatenate(([0], np.cumsum(kept_counts + np.bincount(added, minlength=n))))
+
+    affected = np.unique(np.concatenate((removed, added, np.arange(old_n, n)))).astype(np.int64)
+    return LinkMatrix(pages, indptr, sources, out_indptr, np.concatenate(pieces)), affected
+
+
+def relink_pagerank(links, ranks, changes, damping_factor, tolerance=TOLERANCE, stats=None):
+    """
+    Returns (links, ranks): the LinkMatrix and PageRank vector after the
+    edit `changes` (as taken by relink) to the LinkMatrix `links`, whose
+    PageRank vector was `ranks`.
+    """
+    old_n = len(links)
+    old_uniform = (1 - damping_factor) / old_n + damping_factor * ranks[links.dangling].sum() / old_n
+    links, affected = relink(links, changes)
+    n = len(links)
+
+    # New pages start at 1 / N, and the ranks are scaled to sum to 1
+    start = np.concatenate((np.asarray(ranks, dtype=np.float64), np.full(n - old_n, 1 / n)))
+    scale = 1 / start.sum()
+    start *= scale
+
+    # Every page's residual has the same uniform part; the pages whose
+    # incoming links changed also have their own
+    uniform = (1 - damping_factor) / n + damping_factor * start[links.dangling].sum() / n - scale * old_uniform
+    positions, sources = gather(links.indptr, affected, links.sources)
+    received = np.bincount(positions, weights=start[sources] / links.out_degree[sources], minlength=len(affected))
+    residuals = np.zeros(n)
+    residuals[affected] = ((1 - damping_factor) / n + damping_factor * received - start[affected]
+                           + damping_factor * start[links.dangling].sum() / n - uniform)
+    return links, push(links, start, residuals, damping_factor, tolerance, stats, affected, uniform)
+
+
+def incremental_pagerank(ranks, corpus, damping_factor, tolerance=TOLERANCE, stats=None):
+    """
+    Return PageRank values for each page of the edited `corpus`, like
+    iterate_pagerank in pagerank.py, updating the dictionary of `ranks`
+    from before the edit rather than starting again from uniform ranks.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    start = warm_start(list(ranks), list(ranks.values()), links)
+    return links.ranks_dict(update(links, start, damping_factor, tolerance, stats))
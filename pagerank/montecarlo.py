@@ -0,0 +1,122 @@
+"""
+Monte Carlo PageRank with the complete-path estimator.
+
+Rather than one long random walk, each round starts a short walk from
+every page. At each step a walk ends with probability 1 - d, and otherwise
+moves on along a random link (or, from a page without links, to a random
+page), as the random surfer of pagerank.py would. Every page visited along
+every walk is counted (the complete-path estimator of Avrachenkov et al.,
+"Monte Carlo methods in PageRank computation: when one iteration is
+sufficient"), and a page's rank is its share of all the visits counted.
+
+All walks of a round move together, one NumPy operation per step. Each
+round gives an independent estimate of the ranks, so after every round
+the spread of those estimates gives a confidence interval for each page's
+rank, and the walks stop once every interval is narrower than the target.
+
+The target is relative: a share `width` of the page's own rank, or of the
+average rank 1 / N if that is larger, so that small pages don't have to
+be known to the same fine absolute precision as the most popular ones.
+The visits to a page grow with its rank and with N, so the rounds needed
+are then about the same for corpora of any size: roughly 2 / width^2.
+"""
+
+import time
+import warnings
+from collections import Counter
+from statistics import NormalDist
+
+import numpy as np
+
+from sampler import random_links
+from sparse import Convergence, LinkMatrix
+
+# Target width of the confidence interval on every page's rank, as a share
+# of the larger of its rank and the average rank
+WIDTH = 0.1
+CONFIDENCE = 0.95
+
+# Rounds before the spread of the estimates is trusted, and at most
+MIN_ROUNDS = 10
+MAX_ROUNDS = 10000
+
+
+def walk_round(links, damping_factor, walks, rng):
+    """
+    Returns the number of visits to each page by `walks` walks from every
+    page of the LinkMatrix `links`, each ending with probability 1 - d per step.
+    """
+    n = len(links)
+    counts = np.zeros(n, dtype=np.int64)
+    position = np.tile(np.arange(n), walks)
+    while len(position):
+        counts += np.bincount(position, minlength=n)
+        position = position[rng.random(len(position)) < damping_factor]
+
+        dangling = links.dangling[position]
+        position[dangling] = rng.integers(0, n, int(dangling.sum()))
+        position[~dangling] = random_links(links, position[~dangling], rng)
+    return counts
+
+
+def monte_carlo(links, damping_factor, width=WIDTH, confidence=CONFIDENCE, walks=1,
+                max_rounds=MAX_ROUNDS, seed=None, stats=None):
+    """
+    Returns (ranks, convergence): the PageRank vector of the LinkMatrix
+    `links`, estimated from rounds of `walks` walks from every page, until
+    the `confidence` interval on every page's rank is narrower than
+    `width` times the larger of that rank and 1 / N, or after `max_rounds`
+    rounds. The convergence residuals are the widest interval after each
+    round, in the same relative terms. If `stats` is given, counts the
+    "walks" and "steps" taken in it.
+    """
+    rng = np.random.default_rng(seed)
+    stats = stats if stats is not None else Counter()
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n = len(links)
+
+    # Running sums of visits, and of each round's estimate and its square
+    visits = np.zeros(n, dtype=np.int64)
+    total = np.zeros(n)
+    squares = np.zeros(n)
+
+    convergence = Convergence()
+    while convergence.iterations < max_rounds:
+        start = time.perf_counter()
+        counts = walk_round(links, damping_factor, walks, rng)
+        visits += counts
+        estimate = counts / counts.sum()
+        total += estimate
+        squares += estimate * estimate
+        convergence.iterations += 1
+        stats["walks"] += walks * n
+        stats["steps"] += int(counts.sum())
+
+        rounds = convergence.iterations
+        if rounds > 1:
+            variance = np.maximum(squares - total * total / rounds, 0) / (rounds - 1)
+            scale = np.maximum(visits / visits.sum(), 1 / n)
+            widest = float((2 * z * np.sqrt(variance / rounds) / scale).max())
+        else:
+            widest = float("inf")
+        convergence.residuals.append(widest)
+        convergence.seconds.append(time.perf_counter() - start)
+        if rounds >= MIN_ROUNDS and widest < width:
+            convergence.converged = True
+            break
+    return visits / visits.sum(), convergence
+
+
+def monte_carlo_pagerank(corpus, damping_factor, width=WIDTH, seed=None, max_rounds=MAX_ROUNDS):
+    """
+    Return PageRank values for each page, like sample_pagerank in
+    pagerank.py, estimated from short walks until every page's rank is
+    known to within a confidence interval of relative `width`. Warns if
+    that takes more than `max_rounds` rounds.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    ranks, convergence = monte_carlo(links, damping_factor, width, seed=seed, max_rounds=max_rounds)
+    if not convergence.converged:
+        warnings.warn(f"Monte Carlo PageRank stopped after {convergence.iterations} rounds "
+                      f"without reaching width {width:g}: {convergence!r}", RuntimeWarning, stacklevel=2)
+    return links.ranks_dict(ranks)
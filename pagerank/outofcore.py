@@ -0,0 +1,158 @@
+"""
+Out-of-core PageRank over an on-disk link file.
+
+A corpus too large for the dictionary returned by crawl is written, one
+page at a time, to a compact binary file of its links, as a CSR matrix by
+source: the destination of every link, as int32 page numbers grouped by
+source page, followed by int64 offsets, so that page i links to
+targets[offsets[i]:offsets[i + 1]]. Page names go to a text file alongside.
+
+The file is memory-mapped, and each power-iteration sweep streams over it
+a block of links at a time, so only vectors with one entry per page (the
+ranks, and the out-degrees) are held in memory. An EdgeFile provides the
+same step, out_indptr and targets as a LinkMatrix, so sampler.sample and
+sparse.solve's power-iteration methods ("jacobi", "aitken" and
+"quadratic") run on it unchanged. Gauss-Seidel sweeps need the links by
+destination, which the file does not hold.
+
+python pagerank.py --out-of-core ranks a corpus directory this way, or a
+link file written beforehand with
+
+    python outofcore.py corpus [links]
+"""
+
+import os
+import struct
+import sys
+
+import numpy as np
+
+from crawler import extract_links
+
+MAGIC = b"PRLINKS\n"
+HEADER = struct.Struct("<QQ")
+FILENAME = "pagerank.edges"
+
+# Least number of links streamed per block of a sweep (at least one per page)
+BLOCK = 1 << 22
+
+USAGE = "Usage: python outofcore.py corpus [links]"
+
+
+def pages_path(path):
+    return path + ".pages"
+
+
+def write_links(path, pages, links):
+    """
+    Writes a link file for `pages`, where `links` yields, for each page
+    in order, the page numbers it links to. Only the offsets are held in
+    memory; the file replaces any previous one once it is complete.
+    """
+    offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(pages), 0))
+        count = 0
+        for i, targets in enumerate(links):
+            targets = np.asarray(targets, dtype=np.int32)
+            f.write(targets.tobytes())
+            count += len(targets)
+            offsets[i + 1] = count
+        f.write(offsets.tobytes())
+        f.seek(len(MAGIC))
+        f.write(HEADER.pack(len(pages), count))
+    with open(pages_path(temporary), "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+    os.replace(pages_path(temporary), pages_path(path))
+    os.replace(temporary, path)
+
+
+def build(directory, path=None):
+    """
+    Writes the link file for the HTML pages in `directory`, reading one
+    page at a time, and returns its path (default: FILENAME in `directory`).
+    """
+    path = path or os.path.join(directory, FILENAME)
+    pages = [filename for filename in os.listdir(directory) if filename.endswith(".html")]
+    index = {page: i for i, page in enumerate(pages)}
+
+    def links():
+        for i, page in enumerate(pages):
+            found = extract_links(os.path.join(directory, page))
+            yield sorted(index[link] for link in found if link in index and index[link] != i)
+
+    write_links(path, pages, links())
+    return path
+
+
+class EdgeFile():
+    """
+    A memory-mapped link file, as written by write_links.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a link file: {path}")
+            n, m = HEADER.unpack(f.read(HEADER.size))
+        start = len(MAGIC) + HEADER.size
+        self.targets = np.memmap(path, dtype=np.int32, mode="r", offset=start, shape=(m,))
+        self.out_indptr = np.memmap(path, dtype=np.int64, mode="r", offset=start + 4 * m, shape=(n + 1,))
+        self.out_degree = np.diff(self.out_indptr)
+        self.dangling = self.out_degree == 0
+        self.path = path
+        self._pages = None
+
+        # Page numbers at which each block of at least BLOCK links starts
+        size = max(BLOCK, n)
+        self.blocks = np.unique(np.searchsorted(self.out_indptr, np.arange(0, m, size), side="right") - 1)
+        self.blocks = np.append(self.blocks, n)
+
+    @property
+    def pages(self):
+        if self._pages is None:
+            with open(pages_path(self.path), encoding="utf-8") as f:
+                self._pages = [line.rstrip("\n") for line in f]
+        return self._pages
+
+    def __len__(self):
+        return len(self.out_degree)
+
+    def propagate(self, ranks):
+        """
+        Returns the rank each page receives from its links, plus an even
+        share of the rank of pages with no links, streaming over the links
+        a block at a time.
+        """
+        n = len(self)
+        share = np.divide(ranks, self.out_degree, out=np.zeros_like(ranks), where=~self.dangling)
+        received = np.zeros(n)
+        for start, end in zip(self.blocks[:-1], self.blocks[1:]):
+            lo, hi = self.out_indptr[start], self.out_indptr[end]
+            weights = np.repeat(share[start:end], self.out_degree[start:end])
+            received += np.bincount(self.targets[lo:hi], weights=weights, minlength=n)
+        return received + ranks[self.dangling].sum() / n
+
+    def step(self, ranks, damping_factor):
+        """
+        Returns the ranks after one PageRank power-iteration sweep.
+        """
+        return (1 - damping_factor) / len(self) + damping_factor * self.propagate(ranks)
+
+    def ranks_dict(self, ranks):
+        return {page: float(rank) for page, rank in zip(self.pages, ranks)}
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit(USAGE)
+    path = build(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else None)
+    edges = EdgeFile(path)
+    print(f"{len(edges):,} pages, {len(edges.targets):,} links written to {path}")
+
+
+if __name__ == "__main__":
+    main()
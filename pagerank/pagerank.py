@@ -5,20 +5,40 @@ import sys
 
 DAMPING = 0.85
 SAMPLES = 10000
+TOLERANCE = 0.001
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    if len(args) != 1 or flags - {"--fast", "--out-of-core"}:
+        sys.exit("Usage: python pagerank.py [--fast | --out-of-core] corpus")
+    if "--out-of-core" in flags:
+        # Ranks a memory-mapped link file, built from the corpus unless given one
+        import outofcore
+        import sampler
+        import sparse
+        edges = outofcore.EdgeFile(args[0] if os.path.isfile(args[0]) else outofcore.build(args[0]))
+        sampled = edges.ranks_dict(sampler.sample(edges, DAMPING, SAMPLES))
+        iterated = edges.ranks_dict(sparse.iterate(edges, DAMPING))
+    elif "--fast" in flags:
+        # The incremental crawler and NumPy engines are only needed, and imported, with --fast
+        import crawler
+        import sampler
+        import sparse
+        corpus = crawler.crawl(args[0])
+        sampled = sampler.vectorized_pagerank(corpus, DAMPING, SAMPLES)
+        iterated = sparse.sparse_pagerank(corpus, DAMPING)
+    else:
+        corpus = crawl(args[0])
+        sampled = sample_pagerank(corpus, DAMPING, SAMPLES)
+        iterated = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    for page in sorted(sampled):
+        print(f"  {page}: {sampled[page]:.4f}")
     print(f"PageRank Results from Iteration")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
+    for page in sorted(iterated):
+        print(f"  {page}: {iterated[page]:.4f}")
 
 
 def crawl(directory):
@@ -48,14 +68,35 @@ def crawl(directory):
     return pages
 
 
-def transition_model(corpus, page, damping_factor):
+def teleport_distribution(pages, preferences):
+    """
+    Return the teleport distribution, a dictionary of probabilities by
+    page, for `preferences`: either a dictionary of weights by page, or a
+    collection of pages (a topic) to teleport to uniformly. The weights
+    are scaled to sum to 1; a page not among `pages`, a negative weight,
+    or weights that are all zero raise ValueError.
+    """
+    if not isinstance(preferences, dict):
+        preferences = {page: 1 for page in preferences}
+    for page in preferences:
+        if page not in pages:
+            raise ValueError(f"Unknown page: {page}")
+    total = sum(preferences.values())
+    if total <= 0 or any(weight < 0 for weight in preferences.values()):
+        raise ValueError("Teleport weights must be non-negative and not all zero")
+    return {page: weight / total for page, weight in preferences.items()}
+
+
+def transition_model(corpus, page, damping_factor, teleport=None):
     """
     Return a probability distribution over which page to visit next,
     given a current page.
 
     With probability `damping_factor`, choose a link at random
     linked to by `page`. With probability `1 - damping_factor`, choose
-    a link at random chosen from all pages in the corpus.
+    a link at random chosen from all pages in the corpus, or, for
+    personalized PageRank, a page chosen from the `teleport` dictionary
+    of probabilities (pages not in it are never chosen).
     """
 
     # If no links are in the current page, just do everything in the corpus
@@ -63,7 +104,10 @@ def transition_model(corpus, page, damping_factor):
         return {reference: 1 / len(corpus) for reference in corpus}
 
     else:  # Consider non-linked pages
-        probabilityDictionary = {reference: (1 - damping_factor) / len(corpus) for reference in corpus}
+        if teleport is None:
+            probabilityDictionary = {reference: (1 - damping_factor) / len(corpus) for reference in corpus}
+        else:
+            probabilityDictionary = {reference: (1 - damping_factor) * teleport.get(reference, 0) for reference in corpus}
 
         for reference in corpus[page]:  # Consider linked pages
             probabilityDictionary[reference] += damping_factor / len(corpus[page])
@@ -71,22 +115,27 @@ def transition_model(corpus, page, damping_factor):
     return probabilityDictionary
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, teleport=None):
     """
     Return PageRank values for each page by sampling `n` pages
-    according to transition model, starting with a page at random.
+    according to transition model, starting with a page at random,
+    and teleporting according to `teleport` (as taken by
+    teleport_distribution) if given.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
 
+    if teleport is not None:
+        teleport = teleport_distribution(corpus, teleport)
+
     pageRankings = {link: 0 for link in corpus}
     page = random.choice(list(pageRankings.keys()))  # Start with a random page.
 
     for i in range(0, n):
         pageRankings[page] += 1
-        pageDistribution = transition_model(corpus, page, damping_factor)
+        pageDistribution = transition_model(corpus, page, damping_factor, teleport)
 
         # Deciding the next page.
         pages = list(pageDistribution.keys())
@@ -99,29 +148,47 @@ def sample_pagerank(corpus, damping_factor, n):
     return pageRankings
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE, norm="max", max_iterations=None, teleport=None):
     """
     Return PageRank values for each page by iteratively updating
-    PageRank values until convergence.
+    PageRank values until convergence: until the change in PageRank
+    values is less than `tolerance`, measured as the largest change in
+    any page's value (norm "max") or the sum of all changes (norm "l1"),
+    or after `max_iterations` updates if given. With a `teleport`
+    distribution (as taken by teleport_distribution), computes
+    personalized PageRank.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
 
+    if norm not in ("max", "l1"):
+        raise ValueError(f"Unknown norm: {norm}")
+
     pages = list((corpus.keys()))
     oldPageRanking = {reference: 1 / len(pages) for reference in pages}
     newPageRanking = {reference: 1 / len(pages) for reference in pages}
 
+    if teleport is None:
+        teleport = {reference: 1 / len(pages) for reference in pages}
+    else:
+        teleport = teleport_distribution(corpus, teleport)
+
+    iterations = 0
     while True:
         # Assigning new probability values to each reference
         for reference in oldPageRanking:
-            newPageRanking[reference] = (1 - damping_factor) / len(oldPageRanking) + damping_factor * iteration(corpus,
-                                                                                                                oldPageRanking,
-                                                                                                                reference)
+            newPageRanking[reference] = (1 - damping_factor) * teleport.get(reference, 0) + damping_factor * iteration(corpus,
+                                                                                                                       oldPageRanking,
+                                                                                                                       reference)
+
+        iterations += 1
 
         # Check for convergence
-        if all(abs(oldPageRanking[page] - newPageRanking[page]) < 0.001 for page in oldPageRanking):
+        changes = [abs(oldPageRanking[page] - newPageRanking[page]) for page in oldPageRanking]
+        change = max(changes) if norm == "max" else sum(changes)
+        if change < tolerance or iterations == max_iterations:
             return newPageRanking
 
         # Update the oldPageRanking.
@@ -0,0 +1,196 @@
+"""
+Multi-core PageRank power iteration.
+
+The LinkMatrix of a corpus is copied once into a block of shared memory,
+together with the rank vectors, and its rows (pages, by destination) are
+split into one partition per worker process, balanced by number of links.
+Each sweep, the parent computes every page's share of rank to pass on,
+then each worker computes the new ranks of its own partition's pages from
+the shared vectors, in place, so nothing but a few numbers per partition
+is pickled between processes. The pool's map is the barrier between sweeps.
+
+Usage:
+    python parallel.py corpus [processes]
+"""
+
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from sparse import MAX_ITERATIONS, NORMS, TOLERANCE, Convergence, LinkMatrix
+
+# Set in each worker process by attach
+worker_arrays = None
+worker_memory = None
+
+USAGE = "Usage: python parallel.py corpus [processes]"
+
+
+def layout(links):
+    """
+    Returns ({name: (offset, dtype, length)}, size) for the arrays shared
+    with workers: the LinkMatrix's CSR arrays, each page's share of rank,
+    and two rank vectors that sweeps alternate between.
+    """
+    n = len(links)
+    arrays = (
+        ("indptr", np.int64, n + 1),
+        ("sources", np.int64, len(links.sources)),
+        ("destinations", np.int64, len(links.destinations)),
+        ("share", np.float64, n),
+        ("ranks0", np.float64, n),
+        ("ranks1", np.float64, n),
+    )
+    sections = {}
+    offset = 0
+    for name, dtype, length in arrays:
+        sections[name] = (offset, dtype, length)
+        offset += length * np.dtype(dtype).itemsize
+    return sections, offset
+
+
+def view(buffer, sections):
+    """
+    Returns {name: array} viewing each section of `buffer` in place.
+    """
+    return {
+        name: np.ndarray((length,), dtype=dtype, buffer=buffer, offset=offset)
+        for name, (offset, dtype, length) in sections.items()
+    }
+
+
+class SharedLinks():
+    """
+    A LinkMatrix's arrays and rank vectors in one named shared memory block.
+    """
+
+    def __init__(self, links):
+        self.sections, size = layout(links)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.arrays = view(self.memory.buf, self.sections)
+        for name in ("indptr", "sources", "destinations"):
+            self.arrays[name][:] = getattr(links, name)
+
+    def close(self):
+        # Views must be released before the block can be closed
+        self.arrays = None
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(name, sections):
+    """
+    Pool initializer: view the shared arrays from inside a worker process.
+    """
+    global worker_arrays, worker_memory
+    worker_memory = shared_memory.SharedMemory(name=name)
+    worker_arrays = view(worker_memory.buf, sections)
+
+
+def sweep(task):
+    """
+    Computes the new ranks of pages start..end-1 in a worker, writing them
+    to ranks{target}, and returns (l1, max) of their change from ranks{1 - target}.
+    """
+    start, end, n, damping_factor, dangling_rank, target = task
+    indptr = worker_arrays["indptr"]
+    lo, hi = indptr[start], indptr[end]
+    received = np.bincount(worker_arrays["destinations"][lo:hi] - start,
+                           weights=worker_arrays["share"][worker_arrays["sources"][lo:hi]],
+                           minlength=end - start)
+    updated = (1 - damping_factor) / n + damping_factor * (received + dangling_rank / n)
+
+    change = np.abs(updated - worker_arrays[f"ranks{1 - target}"][start:end])
+    worker_arrays[f"ranks{target}"][start:end] = updated
+    if not len(change):
+        return 0.0, 0.0
+    return float(change.sum()), float(change.max())
+
+
+def partitions(links, count):
+    """
+    Returns `count` or fewer (start, end) ranges of pages covering all
+    pages, each with about the same number of links to them.
+    """
+    n = len(links)
+    bounds = np.searchsorted(links.indptr, np.linspace(0, links.indptr[-1], count + 1)[1:-1])
+    bounds = np.unique(np.concatenate(([0], bounds, [n])))
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def solve(links, damping_factor, tolerance=TOLERANCE, norm="max", max_iterations=MAX_ITERATIONS,
+          processes=None):
+    """
+    Returns (ranks, convergence) like sparse.solve with the "jacobi"
+    method, sweeping across `processes` workers (default: one per CPU).
+    """
+    if norm not in NORMS:
+        raise ValueError(f"Unknown norm: {norm}")
+    processes = processes or os.cpu_count()
+    n = len(links)
+    ranges = partitions(links, processes)
+
+    convergence = Convergence()
+    with SharedLinks(links) as shared:
+        arrays = shared.arrays
+        arrays["ranks0"][:] = 1 / n
+        current = 0
+        with Pool(processes, initializer=attach, initargs=(shared.memory.name, shared.sections)) as pool:
+            while convergence.iterations < max_iterations:
+                start = time.perf_counter()
+                ranks = arrays[f"ranks{current}"]
+                np.divide(ranks, links.out_degree, out=arrays["share"], where=~links.dangling)
+                arrays["share"][links.dangling] = 0
+                dangling_rank = float(ranks[links.dangling].sum())
+
+                tasks = [(lo, hi, n, damping_factor, dangling_rank, 1 - current) for lo, hi in ranges]
+                changes = pool.map(sweep, tasks)
+                current = 1 - current
+                convergence.iterations += 1
+
+                residual = sum(l1 for l1, _ in changes) if norm == "l1" else max(m for _, m in changes)
+                convergence.residuals.append(residual)
+                convergence.seconds.append(time.perf_counter() - start)
+                if residual < tolerance:
+                    convergence.converged = True
+                    break
+        ranks = arrays[f"ranks{current}"].copy()
+        del arrays
+    return ranks, convergence
+
+
+def parallel_pagerank(corpus, damping_factor, tolerance=TOLERANCE, processes=None):
+    """
+    Return (ranks, convergence): PageRank values for each page, like
+    iterate_pagerank in pagerank.py, computed across a pool of processes,
+    and the Convergence diagnostics, including the seconds per sweep.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    ranks, convergence = solve(links, damping_factor, tolerance, processes=processes)
+    return links.ranks_dict(ranks), convergence
+
+
+def main():
+    from pagerank import DAMPING, crawl
+    if len(sys.argv) not in (2, 3):
+        sys.exit(USAGE)
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    ranks, convergence = parallel_pagerank(crawl(sys.argv[1]), DAMPING, processes=processes)
+    print("PageRank Results from Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+    for i, (seconds, residual) in enumerate(zip(convergence.seconds, convergence.residuals), 1):
+        print(f"Iteration {i}: {seconds * 1000:.2f} ms, change {residual:.3g}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Personalized and topic-sensitive PageRank, many queries at once.
+
+Personalized PageRank teleports, with probability 1 - d, to a page chosen
+from a per-query teleport distribution rather than uniformly, so
+
+    rank = (1 - d) * teleport + d * (rank received from links)
+
+Pages without links still link to every page, as in pagerank.py. For a
+topic, the teleport distribution is uniform over the topic's pages.
+The ranks are linear in the teleport distribution, so once the ranks of
+some topics are known, those of any weighted mix of the topics are the
+same mix of their ranks, and need no further iteration.
+
+Many queries are solved together: their ranks are the columns of an
+N x K matrix, and each sweep is one sparse-times-dense product of the
+N x N transition matrix (a SciPy CSR matrix, with rows by destination)
+with it. Each link is read once per sweep for all K queries, rather than
+once per query, and each query drops out of the sweeps once its own ranks
+have converged.
+"""
+
+import time
+
+import numpy as np
+import scipy.sparse
+
+from pagerank import teleport_distribution
+from sparse import MAX_ITERATIONS, NORMS, TOLERANCE, Convergence, LinkMatrix
+
+
+def teleport_vector(links, preferences):
+    """
+    Returns the teleport distribution over the pages of the LinkMatrix
+    `links` for `preferences`: either a dictionary of weights by page, or
+    a collection of pages (a topic) to teleport to uniformly, validated
+    and normalized by teleport_distribution in pagerank.py.
+    """
+    index = {page: i for i, page in enumerate(links.pages)}
+    teleport = np.zeros(len(links))
+    for page, probability in teleport_distribution(index, preferences).items():
+        teleport[index[page]] = probability
+    return teleport
+
+
+def transition_matrix(links):
+    """
+    Returns the N x N CSR matrix of the LinkMatrix `links` whose entry
+    (j, i) is the share of page i's rank it sends along a link to page j.
+    """
+    n = len(links)
+    weights = 1 / links.out_degree[links.sources]
+    return scipy.sparse.csr_matrix((weights, links.sources, links.indptr), shape=(n, n))
+
+
+def propagate_many(links, matrix, ranks):
+    """
+    Returns the rank each page receives from its links, plus an even share
+    of the rank of pages with no links, for each column of the N x K
+    `ranks`, given the transition_matrix of `links`.
+    """
+    received = matrix @ ranks
+    received += ranks[links.dangling].sum(axis=0) / len(links)
+    return received
+
+
+def solve_many(links, damping_factor, teleports, tolerance=TOLERANCE, norm="max", max_iterations=MAX_ITERATIONS):
+    """
+    Returns (ranks, convergence): the personalized PageRank vectors of the
+    LinkMatrix `links` for each row of the K x N `teleports`, iterating
+    until, in every row, the `norm` of the change in ranks is below
+    `tolerance`. The residuals in the diagnostics are the largest over the
+    rows still being iterated.
+    """
+    if norm not in NORMS:
+        raise ValueError(f"Unknown norm: {norm}")
+    k, n = teleports.shape
+    matrix = transition_matrix(links)
+    results = np.empty((k, n))
+
+    # Only the queries still being iterated are kept, a column each
+    active = np.arange(k)
+    ranks = np.full((n, k), 1 / n)
+    base = (1 - damping_factor) * np.ascontiguousarray(np.asarray(teleports, dtype=np.float64).T)
+
+    convergence = Convergence()
+    while convergence.iterations < max_iterations:
+        start = time.perf_counter()
+        new_ranks = propagate_many(links, matrix, ranks)
+        new_ranks *= damping_factor
+        new_ranks += base
+        convergence.iterations += 1
+
+        change = np.abs(np.subtract(new_ranks, ranks, out=ranks))
+        residuals = change.sum(axis=0) if norm == "l1" else change.max(axis=0)
+        convergence.residuals.append(float(residuals.max()))
+        ranks = new_ranks
+
+        done = residuals < tolerance
+        if done.any():
+            results[active[done]] = ranks[:, done].T
+            active = active[~done]
+            ranks = np.ascontiguousarray(ranks[:, ~done])
+            base = np.ascontiguousarray(base[:, ~done])
+        convergence.seconds.append(time.perf_counter() - start)
+        if not len(active):
+            convergence.converged = True
+            break
+    results[active] = ranks.T
+    return results, convergence
+
+
+def batch_pagerank(corpus, damping_factor, queries, tolerance=TOLERANCE):
+    """
+    Return a list of personalized PageRank dictionaries for `corpus`, one
+    for each of `queries` (each as taken by teleport_vector), solved together.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    teleports = np.vstack([teleport_vector(links, preferences) for preferences in queries])
+    ranks, _ = solve_many(links, damping_factor, teleports, tolerance)
+    return [links.ranks_dict(row) for row in ranks]
+
+
+def personalized_pagerank(corpus, damping_factor, preferences, tolerance=TOLERANCE):
+    """
+    Return personalized PageRank values for each page, like
+    iterate_pagerank in pagerank.py with a teleport distribution.
+    """
+    return batch_pagerank(corpus, damping_factor, [preferences], tolerance)[0]
+
+
+def topic_pagerank(corpus, damping_factor, topics, tolerance=TOLERANCE):
+    """
+    Return {topic: ranks} for a dictionary of `topics`, each a collection
+    of pages or a dictionary of weights, solved together.
+    """
+    names = list(topics)
+    ranks = batch_pagerank(corpus, damping_factor, [topics[name] for name in names], tolerance)
+    return dict(zip(names, ranks))
+
+
+def blend(topic_ranks, weights):
+    """
+    Return the personalized PageRank values for teleporting to a mix of
+    topics, with `weights` by topic, from the `topic_ranks` of each topic
+    as returned by topic_pagerank.
+    """
+    total = sum(weights.values())
+    if total <= 0 or any(weight < 0 for weight in weights.values()):
+        raise ValueError("Topic weights must be non-negative and not all zero")
+    pages = next(iter(topic_ranks.values()))
+    return {
+        page: sum(weight * topic_ranks[topic][page] for topic, weight in weights.items()) / total
+        for page in pages
+    }
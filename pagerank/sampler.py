@@ -0,0 +1,80 @@
+"""
+Vectorized random-surfer PageRank sampler.
+
+sample_pagerank in pagerank.py rebuilds the transition model at every
+step of a single surfer. Here the model is precomputed once: each step of
+the surfer is "with probability `damping_factor`, follow one of the page's
+links uniformly at random, otherwise (or if it has no links) jump to any
+page uniformly at random", so the outgoing-link CSR arrays of a
+LinkMatrix are all the table needed: a link is drawn as
+targets[out_indptr[page] + floor(random * out_degree[page])].
+
+Many surfers then walk in parallel, one NumPy operation per step for all
+of them, and their visits are counted in batches with np.bincount.
+"""
+
+import numpy as np
+
+from sparse import LinkMatrix
+
+# Number of surfers walking in parallel
+WALKERS = 10000
+
+# Each surfer takes at least this many steps, so that the uniform random
+# starting pages are a negligible share of the visits counted
+MIN_STEPS = 1000
+
+# Visits are buffered and counted this many at a time
+BUFFER = 1 << 20
+
+
+def random_links(links, pages, rng):
+    """
+    Returns one of the links of each of `pages` (which must all have links),
+    chosen uniformly at random with the generator `rng`.
+    """
+    choice = (rng.random(len(pages)) * links.out_degree[pages]).astype(np.int64)
+    return links.targets[links.out_indptr[pages] + choice]
+
+
+def sample(links, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Returns each page's share of `n` page visits by up to `walkers` random
+    surfers over the LinkMatrix `links`, each starting at a random page.
+    """
+    rng = np.random.default_rng(seed)
+    pages = len(links)
+    walkers = max(1, min(walkers, n // MIN_STEPS))
+    dangling = links.out_degree == 0
+
+    counts = np.zeros(pages, dtype=np.int64)
+    position = rng.integers(0, pages, walkers)
+    steps_per_buffer = max(1, BUFFER // walkers)
+    buffer = np.empty((steps_per_buffer, walkers), dtype=np.int64)
+
+    remaining = n
+    while remaining > 0:
+        steps = min(steps_per_buffer, -(-remaining // walkers))
+        for step in range(steps):
+            buffer[step] = position
+
+            # Surfers on a page with links follow one with probability damping_factor
+            follow = (rng.random(walkers) < damping_factor) & ~dangling[position]
+            following = position[follow]
+            position = rng.integers(0, pages, walkers)
+            position[follow] = random_links(links, following, rng)
+
+        visits = buffer[:steps].ravel()[:remaining]
+        counts += np.bincount(visits, minlength=pages)
+        remaining -= len(visits)
+
+    return counts / n
+
+
+def vectorized_pagerank(corpus, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Return PageRank values for each page, like sample_pagerank in
+    pagerank.py, from `n` samples taken by many surfers at once.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    return links.ranks_dict(sample(links, damping_factor, n, walkers, seed))
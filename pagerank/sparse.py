@@ -0,0 +1,275 @@
+"""
+Sparse-matrix PageRank engine.
+
+The corpus is stored as a CSR (compressed sparse row) matrix whose row i
+lists the pages linking to page i, so one power-iteration sweep is a
+single sparse matrix-vector product, O(pages + links), instead of the
+O(pages^2) scan that iterate_pagerank makes in pagerank.py.
+
+Pages without links are treated, as in pagerank.py, as linking to every
+page. Rather than adding those links to the matrix, their rank is summed
+and spread evenly over all pages (a rank-one correction).
+"""
+
+import time
+
+import numpy as np
+
+# Convergence threshold on the largest change in any page's rank, as in pagerank.py
+TOLERANCE = 0.001
+
+
+class LinkMatrix():
+    """
+    Links between pages numbered 0..n-1, as a CSR matrix by destination:
+    the pages linking to page i are sources[indptr[i]:indptr[i + 1]].
+
+    The same links are also kept by source, for following links forward:
+    page i links to targets[out_indptr[i]:out_indptr[i + 1]].
+    """
+
+    def __init__(self, pages, indptr, sources, out_indptr, targets):
+        self.pages = pages
+        self.indptr = indptr
+        self.sources = sources
+        self.out_indptr = out_indptr
+        self.targets = targets
+        self.out_degree = np.diff(out_indptr)
+
+        # Destination of each link, parallel to sources, for np.bincount
+        self.destinations = np.repeat(np.arange(len(pages)), np.diff(indptr))
+        self.dangling = self.out_degree == 0
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build from a corpus dictionary as returned by crawl.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = []
+        destinations = []
+        for page, links in corpus.items():
+            for link in links:
+                sources.append(index[page])
+                destinations.append(index[link])
+        return cls.from_edges(pages, np.array(sources, dtype=np.int64), np.array(destinations, dtype=np.int64))
+
+    @classmethod
+    def from_edges(cls, pages, sources, destinations):
+        """
+        Build from a list of page names and parallel arrays of link
+        source and destination indexes.
+        """
+        n = len(pages)
+        by_destination = np.argsort(destinations, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(destinations, minlength=n), out=indptr[1:])
+
+        by_source = np.argsort(sources, kind="stable")
+        out_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=out_indptr[1:])
+        return cls(pages, indptr, sources[by_destination], out_indptr, destinations[by_source])
+
+    def __len__(self):
+        return len(self.pages)
+
+    def propagate(self, ranks):
+        """
+        Returns the rank each page receives from its links, plus an even
+        share of the rank of pages with no links: one step of the random
+        surfer who always follows a link.
+        """
+        share = np.divide(ranks, self.out_degree, out=np.zeros_like(ranks), where=~self.dangling)
+        received = np.bincount(self.destinations, weights=share[self.sources], minlength=len(self))
+        return received + ranks[self.dangling].sum() / len(self)
+
+    def step(self, ranks, damping_factor):
+        """
+        Returns the ranks after one PageRank power-iteration sweep.
+        """
+        return (1 - damping_factor) / len(self) + damping_factor * self.propagate(ranks)
+
+    def ranks_dict(self, ranks):
+        return {page: float(rank) for page, rank in zip(self.pages, ranks)}
+
+
+class Convergence():
+    """
+    How a solve went: the number of sweeps made, the residual (the norm of
+    the change in ranks) and the seconds taken for each, and whether the
+    residual fell below tolerance.
+    """
+
+    def __init__(self):
+        self.iterations = 0
+        self.residuals = []
+        self.seconds = []
+        self.converged = False
+
+    def __repr__(self):
+        residual = self.residuals[-1] if self.residuals else None
+        return f"Convergence(iterations={self.iterations}, residual={residual}, converged={self.converged})"
+
+
+def l1_norm(change):
+    return np.abs(change).sum()
+
+
+def max_norm(change):
+    return np.abs(change).max()
+
+
+# Norms of the change in ranks that the tolerance can be measured in
+NORMS = {"l1": l1_norm, "max": max_norm}
+
+MAX_ITERATIONS = 1000
+
+# Largest number of pages per block of a Gauss-Seidel sweep, and the
+# fewest blocks a sweep is split into (smaller blocks for smaller corpora)
+BLOCK = 4096
+MIN_BLOCKS = 64
+
+# Sweeps between Aitken or quadratic extrapolations
+EXTRAPOLATE_EVERY = 10
+
+
+def gauss_seidel_sweep(links, ranks, damping_factor, block=None):
+    """
+    Returns the ranks after one block Gauss-Seidel sweep: pages are updated
+    `block` at a time, each block from the ranks already updated this sweep.
+    """
+    n = len(links)
+    block = block or max(1, min(BLOCK, n // MIN_BLOCKS))
+    ranks = ranks.copy()
+    share = np.divide(ranks, links.out_degree, out=np.zeros_like(ranks), where=~links.dangling)
+    dangling_rank = ranks[links.dangling].sum()
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        lo, hi = links.indptr[start], links.indptr[end]
+        received = np.bincount(links.destinations[lo:hi] - start,
+                               weights=share[links.sources[lo:hi]], minlength=end - start)
+        updated = (1 - damping_factor) / n + damping_factor * (received + dangling_rank / n)
+
+        dangling = links.dangling[start:end]
+        dangling_rank += updated[dangling].sum() - ranks[start:end][dangling].sum()
+        ranks[start:end] = updated
+        np.divide(updated, links.out_degree[start:end], out=share[start:end], where=~dangling)
+    return ranks / ranks.sum()
+
+
+def aitken(x0, x1, x2):
+    """
+    Aitken delta-squared extrapolation of each page's rank from three
+    successive iterates, keeping x2 wherever the estimate is unusable.
+    """
+    g = x1 - x0
+    h = x2 - 2 * x1 + x0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        estimate = x0 - g * g / h
+    usable = np.isfinite(estimate) & (estimate > 0)
+    estimate = np.where(usable, estimate, x2)
+    return estimate / estimate.sum()
+
+
+def quadratic(x0, x1, x2, x3):
+    """
+    Quadratic extrapolation of the ranks from four successive iterates
+    (Kamvar et al., "Extrapolation methods for accelerating PageRank
+    computations"), keeping x3 if the estimate is unusable.
+    """
+    y = np.column_stack((x1 - x0, x2 - x0))
+    gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+    g1, g2, g3 = gamma[0], gamma[1], 1.0
+    estimate = (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+    total = estimate.sum()
+    if not np.isfinite(total) or total <= 0 or (estimate < 0).any():
+        return x3
+    return estimate / total
+
+
+# Ways of computing the next iterate from the current one
+METHODS = ("jacobi", "gauss-seidel", "aitken", "quadratic")
+
+
+def solve(links, damping_factor, tolerance=TOLERANCE, norm="max", max_iterations=MAX_ITERATIONS,
+          method="jacobi", ranks=None):
+    """
+    Returns (ranks, convergence): the PageRank vector of the LinkMatrix
+    `links`, iterating from `ranks` (default: uniform) until the `norm`
+    ("l1" or "max") of the change in ranks falls below `tolerance`, or
+    `max_iterations` sweeps have been made.
+
+    `method` is "jacobi" (plain power iteration, as iterate_pagerank in
+    pagerank.py), "gauss-seidel" (block Gauss-Seidel sweeps, which need a
+    LinkMatrix rather than an outofcore.EdgeFile), or "aitken"
+    or "quadratic" (power iteration, extrapolated every EXTRAPOLATE_EVERY sweeps).
+    Which converges fastest depends on the link structure: Gauss-Seidel
+    only gains from links between blocks, and Aitken extrapolation can
+    slow convergence, so compare the residuals in the diagnostics.
+    """
+    if norm not in NORMS:
+        raise ValueError(f"Unknown norm: {norm}")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    if method == "gauss-seidel" and not hasattr(links, "indptr"):
+        raise ValueError(f"Gauss-Seidel needs the links by destination, which {type(links).__name__} lacks")
+    measure = NORMS[norm]
+    ranks = np.full(len(links), 1 / len(links)) if ranks is None else np.asarray(ranks, dtype=np.float64)
+
+    convergence = Convergence()
+    history = [ranks]
+    while convergence.iterations < max_iterations:
+        start = time.perf_counter()
+        if method == "gauss-seidel":
+            new_ranks = gauss_seidel_sweep(links, ranks, damping_factor)
+        else:
+            new_ranks = links.step(ranks, damping_factor)
+        convergence.iterations += 1
+
+        if method in ("aitken", "quadratic"):
+            history = history[-3:] + [new_ranks]
+            if convergence.iterations % EXTRAPOLATE_EVERY == 0:
+                if method == "aitken":
+                    new_ranks = aitken(*history[-3:])
+                elif len(history) == 4:
+                    new_ranks = quadratic(*history)
+                history = [new_ranks]
+
+        residual = float(measure(new_ranks - ranks))
+        convergence.residuals.append(residual)
+        convergence.seconds.append(time.perf_counter() - start)
+        ranks = new_ranks
+        if residual < tolerance:
+            convergence.converged = True
+            break
+    return ranks, convergence
+
+
+def iterate(links, damping_factor, tolerance=TOLERANCE):
+    """
+    Returns the PageRank vector of the LinkMatrix `links`, iterating from
+    uniform ranks until no page's rank changes by `tolerance` or more.
+    """
+    ranks, _ = solve(links, damping_factor, tolerance, max_iterations=float("inf"))
+    return ranks
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page, like iterate_pagerank in
+    pagerank.py, using the sparse engine.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    return links.ranks_dict(iterate(links, damping_factor, tolerance))
+
+
+def converge_pagerank(corpus, damping_factor, tolerance=TOLERANCE, norm="max",
+                      max_iterations=MAX_ITERATIONS, method="jacobi"):
+    """
+    Return (ranks, convergence): PageRank values for each page, computed
+    with solve, and the Convergence diagnostics of the solve.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    ranks, convergence = solve(links, damping_factor, tolerance, norm, max_iterations, method)
+    return links.ranks_dict(ranks), convergence
@@ -0,0 +1,169 @@
+"""
+Bitboard Tic Tac Toe engine.
+
+A board is a pair of 9-bit integers (x, o), with bit 3 * i + j set where
+that player has played in row i, column j. Everything the search asks of
+a board is then a lookup in a table indexed by one 9-bit mask, built once
+at import: whether a mask holds a line of three, how many marks it has
+(whose turn it is), and which cells it leaves empty. A move is a single OR.
+
+from_board and to_board convert to and from the list boards of
+tictactoe.py, and minimax takes and returns the same values as
+tictactoe.minimax, so runner.py can use either.
+"""
+
+from tictactoe import EMPTY, O, SYMMETRIES, X
+
+FULL = (1 << 9) - 1
+
+# Masks of the 8 lines of three: rows, columns and diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# For each 9-bit mask: whether it holds a line, its number of marks, and
+# the cells it leaves empty
+WINNING = [any(mask & line == line for line in LINES) for mask in range(FULL + 1)]
+COUNT = [bin(mask).count("1") for mask in range(FULL + 1)]
+EMPTY_CELLS = [tuple(cell for cell in range(9) if not mask >> cell & 1) for mask in range(FULL + 1)]
+
+# Each mask under each of the 8 symmetries of the board
+PERMUTED = [
+    [sum(1 << symmetry[cell] for cell in range(9) if mask >> cell & 1) for mask in range(FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+INVERSES = [tuple(symmetry.index(cell) for cell in range(9)) for symmetry in SYMMETRIES]
+
+# Solved positions: canonical (x, o) -> (value, best move in canonical cell numbering)
+transpositions = {}
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboard of a list board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list board of an (x, o) bitboard.
+    """
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def player(x, o):
+    """
+    Returns the player who has the next turn.
+    """
+    return X if COUNT[x] <= COUNT[o] else O
+
+
+def actions(x, o):
+    """
+    Returns the empty cells (numbered 3 * i + j) of the board.
+    """
+    return EMPTY_CELLS[x | o]
+
+
+def result(x, o, cell):
+    """
+    Returns the board after the player to move plays in `cell`.
+    """
+    if (x | o) >> cell & 1:
+        raise Exception("Not a move")
+    if COUNT[x] <= COUNT[o]:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def terminal(x, o):
+    """
+    Returns True if the game is over.
+    """
+    return WINNING[x] or WINNING[o] or x | o == FULL
+
+
+def canonical(x, o):
+    """
+    Returns (key, symmetry): the same key for a board and all its rotations
+    and reflections, and the index in SYMMETRIES of the one that gives it.
+    """
+    return min(((permuted[x], permuted[o]), index) for index, permuted in enumerate(PERMUTED))
+
+
+def search(x, o, table=transpositions):
+    """
+    Returns (value, cell): the value of the board with best play (1 if X
+    wins, -1 if O wins, 0 for a draw) and the best move for the player to
+    move, or None if the game is over. Solved positions are kept in
+    `table`, up to symmetry; pass None to search without one.
+    """
+    if WINNING[x]:
+        return 1, None
+    if WINNING[o]:
+        return -1, None
+    empty = EMPTY_CELLS[x | o]
+    if not empty:
+        return 0, None
+
+    if table is not None:
+        key, symmetry = canonical(x, o)
+        if key in table:
+            value, move = table[key]
+            return value, INVERSES[symmetry][move]
+
+    best_value = None
+    best_cell = None
+    if COUNT[x] <= COUNT[o]:  # X maximizes
+        for cell in empty:
+            value = search(x | 1 << cell, o, table)[0]
+            if best_value is None or value > best_value:
+                best_value, best_cell = value, cell
+                if value == 1:
+                    break
+    else:  # O minimizes
+        for cell in empty:
+            value = search(x, o | 1 << cell, table)[0]
+            if best_value is None or value < best_value:
+                best_value, best_cell = value, cell
+                if value == -1:
+                    break
+
+    if table is not None:
+        table[key] = (best_value, SYMMETRIES[symmetry][best_cell])
+    return best_value, best_cell
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on a list
+    board, or None if the game is over.
+    """
+    _, cell = search(*from_board(board))
+    if cell is None:
+        return None
+    return divmod(cell, 3)
@@ -0,0 +1,212 @@
+"""
+Perfect-play opening book for Tic Tac Toe.
+
+The 3x3 game has only 4520 positions where a move is still to be made,
+so they are all solved once, ahead of time, and stored in a table of one
+byte per board, indexed by the board's base-3 encoding (the digit of cell
+3 * i + j is 0 for empty, 1 for X, 2 for O): 3^9 = 19683 bytes in all.
+Each byte holds the best move and the value of the position with best
+play; boards where the game is over, or that play cannot reach, hold NONE.
+In the file, the table follows a header of MAGIC, the format VERSION and
+a CRC-32 checksum of the table.
+
+minimax then takes and returns the same values as tictactoe.minimax, but
+is a table lookup. The book is read from BOOK, or solved and written
+there on first use if the file is missing, from another version, or fails
+its checksum.
+
+Usage:
+    python book.py [--verify] [path]
+builds the book at `path` (default: BOOK) or, with --verify, checks every
+entry of it (or, if there is no book there, of a freshly solved one)
+against a search of the position without the book.
+"""
+
+import os
+import struct
+import sys
+import zlib
+
+import bitboard
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+SIZE = 3 ** 9
+
+MAGIC = b"TTTBOOK\n"
+VERSION = 1
+
+# Format version and CRC-32 of the table, after MAGIC
+HEADER = struct.Struct("<II")
+
+# Entry of a board without a move to make; other entries are
+# 9 * (value + 1) + cell, for the value with best play (1 if X wins, -1
+# if O wins, 0 for a draw) and the best move
+NONE = 255
+
+# Base-3 place value of each cell
+PLACES = [3 ** cell for cell in range(9)]
+
+USAGE = "Usage: python book.py [--verify] [path]"
+
+# The book in use, loaded on first use
+book = None
+
+
+def encode(x, o):
+    """
+    Returns the base-3 encoding of an (x, o) bitboard.
+    """
+    return sum(PLACES[cell] * (1 if x >> cell & 1 else 2) for cell in range(9) if (x | o) >> cell & 1)
+
+
+def entry(value, cell):
+    return 9 * (value + 1) + cell
+
+
+def decode(byte):
+    """
+    Returns (value, cell) of a book entry, or None for NONE.
+    """
+    if byte == NONE:
+        return None
+    value, cell = divmod(byte, 9)
+    return value - 1, cell
+
+
+def positions():
+    """
+    Yields the (x, o) bitboard of every position reachable from the empty
+    board where the game is not yet over, each once.
+    """
+    seen = set()
+    frontier = [(0, 0)]
+    while frontier:
+        x, o = frontier.pop()
+        if (x, o) in seen or bitboard.terminal(x, o):
+            continue
+        seen.add((x, o))
+        yield x, o
+        for cell in bitboard.actions(x, o):
+            frontier.append(bitboard.result(x, o, cell))
+
+
+def solve():
+    """
+    Returns the book: a bytes table of the best move and value of every position, by encoding.
+    """
+    table = bytearray([NONE]) * SIZE
+    for x, o in positions():
+        table[encode(x, o)] = entry(*bitboard.search(x, o))
+    return bytes(table)
+
+
+def write(table, path=BOOK):
+    """
+    Writes the book `table` to `path`, replacing any previous one only once
+    the new one is complete.
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(VERSION, zlib.crc32(table)))
+        f.write(table)
+    os.replace(temporary, path)
+
+
+def read(path=BOOK):
+    """
+    Returns the book at `path`, or None if it is missing, not a book, from
+    another version, or does not match its checksum.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    start = len(MAGIC) + HEADER.size
+    if len(data) != start + SIZE or not data.startswith(MAGIC):
+        return None
+    version, checksum = HEADER.unpack_from(data, len(MAGIC))
+    table = data[start:]
+    if version != VERSION or zlib.crc32(table) != checksum:
+        return None
+    return table
+
+
+def load(path=BOOK):
+    """
+    Returns the book at `path`, solving and writing it first if need be.
+    """
+    table = read(path)
+    if table is None:
+        table = solve()
+        try:
+            write(table, path)
+        except OSError:
+            # Without a writable directory, the book is solved again next time
+            pass
+    return table
+
+
+def verify(table):
+    """
+    Returns the number of positions checked, and a list of the (x, o)
+    positions whose book entry is wrong: missing, of the wrong value
+    according to a search without the book or transposition table, or
+    with a move that does not keep that value.
+    """
+    checked = 0
+    wrong = []
+    for x, o in positions():
+        checked += 1
+        found = decode(table[encode(x, o)])
+        value, _ = bitboard.search(x, o, None)
+        if found is None or found[0] != value or (x | o) >> found[1] & 1 \
+                or bitboard.search(*bitboard.result(x, o, found[1]), None)[0] != value:
+            wrong.append((x, o))
+    return checked, wrong
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on a list
+    board, or None if the game is over, from the book.
+    """
+    global book
+    if book is None:
+        book = load()
+    x, o = bitboard.from_board(board)
+    found = decode(book[encode(x, o)])
+    if found is None:
+        # Over, or a board that play cannot reach
+        return bitboard.minimax(board)
+    return divmod(found[1], 3)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    if flags - {"--verify"} or len(args) > 1:
+        sys.exit(USAGE)
+    path = args[0] if args else BOOK
+
+    if "--verify" in flags:
+        table = read(path)
+        if table is None:
+            print(f"No book at {path}; verifying a freshly solved one")
+            table = solve()
+        checked, wrong = verify(table)
+        for x, o in wrong[:10]:
+            print(f"Wrong entry for {bitboard.to_board(x, o)}")
+        print(f"{checked} positions checked, {len(wrong)} wrong")
+        if wrong:
+            sys.exit(1)
+        return
+
+    table = solve()
+    write(table, path)
+    print(f"{sum(byte != NONE for byte in table)} positions written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+m,n,k game engine: Tic Tac Toe on any board of m rows and n columns,
+won by k marks in a row.
+
+Boards are the same lists of lists as in tictactoe.py, of any size, and
+minimax(board) returns the same (i, j) moves, but the search can answer
+within a time budget on boards too big to solve outright:
+    - negamax with alpha-beta pruning over bitboards, as in bitboard.py,
+      checking for a win only along the lines through the cell just played;
+    - a transposition table of bounds and best moves, whose best move is
+      tried first, then the cells that lie on the most lines;
+    - iterative deepening, one ply deeper each pass, until the budget runs
+      out, the game is solved, or a forced win or loss is found;
+    - at the depth limit, a heuristic evaluation: lines still open to only
+      one player, weighted by how many of its marks they already hold.
+"""
+
+import time
+
+from tictactoe import EMPTY, O, X
+
+# Seconds minimax may spend on a move
+BUDGET = 1.0
+
+# Score of a won game, plus the number of cells still empty (so that
+# quicker wins score higher); heuristic scores are always far below it
+WIN = 10 ** 9
+
+# Bound types of transposition table entries
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Nodes searched between checks of the clock
+CHECK_EVERY = 1024
+
+# Geometries built so far, by (rows, columns, k)
+geometries = {}
+
+
+class Timeout(Exception):
+    pass
+
+
+class Geometry():
+    """
+    The lines of k cells on a board of `rows` x `columns`, as bit masks
+    over the cells numbered columns * i + j.
+    """
+
+    def __init__(self, rows, columns, k):
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.full = (1 << (rows * columns)) - 1
+
+        self.lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    if 0 <= i + (k - 1) * di < rows and 0 <= j + (k - 1) * dj < columns:
+                        self.lines.append(sum(1 << (columns * (i + t * di) + j + t * dj) for t in range(k)))
+
+        # The lines through each cell, and the cells in order of how many
+        # lines they lie on, then of how near they are to the centre
+        self.through = [[line for line in self.lines if line >> cell & 1] for cell in range(rows * columns)]
+        self.order = sorted(range(rows * columns), key=lambda cell: (
+            -len(self.through[cell]),
+            abs(2 * (cell // columns) - rows + 1) + abs(2 * (cell % columns) - columns + 1)
+        ))
+
+        # Heuristic weight of a line holding c marks of only one player
+        self.weights = [0] + [4 ** c for c in range(1, k + 1)]
+
+
+def geometry(rows, columns, k):
+    if (rows, columns, k) not in geometries:
+        geometries[(rows, columns, k)] = Geometry(rows, columns, k)
+    return geometries[(rows, columns, k)]
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def initial_state(rows=3, columns=3):
+    """
+    Returns an empty board of `rows` x `columns`.
+    """
+    return [[EMPTY] * columns for _ in range(rows)]
+
+
+def default_k(board):
+    return min(len(board), len(board[0]))
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboard of a list board.
+    """
+    columns = len(board[0])
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, space in enumerate(row):
+            if space == X:
+                x |= 1 << (columns * i + j)
+            elif space == O:
+                o |= 1 << (columns * i + j)
+    return x, o
+
+
+def winner(board, k=None):
+    """
+    Returns the winner of the game on `board`, with `k` in a row (default:
+    the length of the board's shorter side), if there is one.
+    """
+    shape = geometry(len(board), len(board[0]), k or default_k(board))
+    x, o = from_board(board)
+    for line in shape.lines:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def terminal(board, k=None):
+    """
+    Returns True if the game on `board` is over.
+    """
+    x, o = from_board(board)
+    shape = geometry(len(board), len(board[0]), k or default_k(board))
+    return winner(board, k) is not None or x | o == shape.full
+
+
+class Search():
+    """
+    One iterative-deepening search, from the point of view of the player to move.
+    """
+
+    def __init__(self, shape, deadline):
+        self.shape = shape
+        self.deadline = deadline
+        self.table = {}
+        self.nodes = 0
+        self.checking = False
+
+    def won(self, mask, cell):
+        return any(mask & line == line for line in self.shape.through[cell])
+
+    def evaluate(self, me, them):
+        """
+        Returns the heuristic value of a position for the player `me` to move.
+        """
+        score = 0
+        weights = self.shape.weights
+        for line in self.shape.lines:
+            mine = me & line
+            theirs = them & line
+            if not theirs:
+                score += weights[popcount(mine)]
+            elif not mine:
+                score -= weights[popcount(theirs)]
+        return score
+
+    def moves(self, empty, first=None):
+        """
+        Returns the empty cells in the order to try them: `first`, then by
+        how many lines they lie on.
+        """
+        ordered = [cell for cell in self.shape.order if empty >> cell & 1 and cell != first]
+        if first is not None:
+            ordered.insert(0, first)
+        return ordered
+
+    def negamax(self, me, them, depth, alpha, beta):
+        """
+        Returns (value, best cell) of the position for `me` to move,
+        searching `depth` plies further.
+        """
+        self.nodes += 1
+        if self.checking and self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        empty = self.shape.full & ~(me | them)
+        if not empty:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(me, them), None
+
+        original_alpha = alpha
+        entry = self.table.get((me, them))
+        first = None
+        if entry is not None:
+            stored_depth, value, bound, first = entry
+            if stored_depth >= depth:
+                if bound == EXACT:
+                    return value, first
+                if bound == LOWER:
+                    alpha = max(alpha, value)
+                elif bound == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, first
+
+        remaining = popcount(empty) - 1
+        best_value = -2 * WIN
+        best_cell = None
+        for cell in self.moves(empty, first):
+            played = me | 1 << cell
+            if self.won(played, cell):
+                value = WIN + remaining
+            else:
+                value = -self.negamax(them, played, depth - 1, -beta, -alpha)[0]
+            if value > best_value:
+                best_value, best_cell = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[(me, them)] = (depth, best_value, bound, best_cell)
+        return best_value, best_cell
+
+
+def minimax(board, k=None, budget=BUDGET):
+    """
+    Returns the best action (i, j) found for the current player on
+    `board`, with `k` in a row to win (default: the length of the board's
+    shorter side), searching for up to `budget` seconds, or None if the
+    game is over. The first ply is always searched in full.
+    """
+    rows, columns = len(board), len(board[0])
+    shape = geometry(rows, columns, k or default_k(board))
+    x, o = from_board(board)
+    if any(x & line == line or o & line == line for line in shape.lines):
+        return None
+    empty = shape.full & ~(x | o)
+    if not empty:
+        return None
+    me, them = (x, o) if popcount(x) <= popcount(o) else (o, x)
+
+    search = Search(shape, time.perf_counter() + budget)
+    best_cell = None
+    for depth in range(1, popcount(empty) + 1):
+        try:
+            value, best_cell = search.negamax(me, them, depth, -2 * WIN, 2 * WIN)
+        except Timeout:
+            break
+        # Later passes may run out of time; the first always finishes
+        search.checking = True
+        if abs(value) >= WIN:
+            break
+    return divmod(best_cell, columns)
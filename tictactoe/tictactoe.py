@@ -8,6 +8,27 @@ X = "X"
 O = "O"
 EMPTY = None
 
+# The 8 symmetries of the board (4 rotations, each with or without a reflection),
+# as where each of the cells 0-8 (numbered row by row) moves to
+SYMMETRIES = [
+    tuple(3 * a + b for a, b in (transform(i, j) for i in range(3) for j in range(3)))
+    for transform in (
+        lambda i, j: (i, j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i),
+    )
+]
+# Where each cell of a transformed board came from
+INVERSES = [tuple(symmetry.index(cell) for cell in range(9)) for symmetry in SYMMETRIES]
+
+# Solved positions: canonical board -> (value, best move in canonical cell numbering)
+transpositions = {}
+
 
 def initial_state():
     """
@@ -137,9 +158,53 @@ def minimax(board):
         return bestMove
 
 
+def canonical(board):
+    """
+    Returns (key, symmetry): the same key for a board and all its rotations
+    and reflections, and the index in SYMMETRIES of the one that gives it.
+    """
+    cells = [space or "." for row in board for space in row]
+    best = None
+    for index, symmetry in enumerate(SYMMETRIES):
+        transformed = [None] * 9
+        for cell, space in enumerate(cells):
+            transformed[symmetry[cell]] = space
+        key = "".join(transformed)
+        if best is None or key < best[0]:
+            best = (key, index)
+    return best
+
+
+def lookup(board):
+    """
+    Returns (key, symmetry, solved): the board's canonical key and symmetry,
+    and its (value, best move) if it has been solved before, else None.
+    """
+    key, symmetry = canonical(board)
+    if key not in transpositions:
+        return key, symmetry, None
+    value, move = transpositions[key]
+    if move is not None:
+        cell = INVERSES[symmetry][move]
+        move = (cell // 3, cell % 3)
+    return key, symmetry, (value, move)
+
+
+def store(key, symmetry, value, action):
+    """
+    Records the value and best move of a board, under its canonical key.
+    """
+    move = SYMMETRIES[symmetry][3 * action[0] + action[1]] if action is not None else None
+    transpositions[key] = (value, move)
+    return value, action
+
+
 def Max_Value(board):
     if terminal(board): # First check if the game is over
         return utility(board), None
+    key, symmetry, solved = lookup(board) # Every position, up to symmetry, is only searched once
+    if solved is not None:
+        return solved
     v = -math.inf # So next position is by default going to be greater
     bestAction = None
     for action in actions(board):
@@ -149,13 +214,16 @@ def Max_Value(board):
             bestAction = action
             v = minimumValue
         if v == 1: # Pruning. If found position with v =1 , no need to continue
-            return v, action
+            break
 
-    return v, bestAction
+    return store(key, symmetry, v, bestAction)
 
 def Min_Value(board):
     if terminal(board): # Check if game is over
         return utility(board), None
+    key, symmetry, solved = lookup(board)
+    if solved is not None:
+        return solved
     bestAction = None
     v = math.inf # Next position will by default be smaller
     for action in actions(board):
@@ -165,5 +233,5 @@ def Min_Value(board):
             bestAction = action
             v = maximumValue
         if v == -1: # Pruning. If found position with v = -1 , no need to continue
-            return v, action
-    return v, bestAction
+            break
+    return store(key, symmetry, v, bestAction)